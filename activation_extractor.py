@@ -9,52 +9,206 @@ import os
 import sys
 import json
 import re
+import importlib.util
 import subprocess
+import concurrent.futures
+import configparser
+import mmap
 import requests
 import time
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 import base64
+import hashlib
+from http.cookiejar import MozillaCookieJar
 from selenium_activator import SeleniumActivationExtractor
 
+# Home directory resolved once at import - Path.home() does an env/registry
+# lookup on every call on Windows
+_HOME = Path.home()
+
+AB_CACHE_FILE = _HOME / ".audible_ab_cache.json"
+SESSION_COOKIES_FILE = _HOME / ".audible_session.cookies"
+AUTH_FILE = _HOME / ".audible_auth.json"
+
+# Don't bother reading files bigger than this during the file search -
+# activation bytes live in small config/log files
+MAX_SEARCH_FILE_SIZE = 16 * 1024 * 1024
+
+# Single compiled union of the activation-bytes patterns so each file is
+# scanned in one pass instead of three. Bytes-mode so it can run directly
+# against an mmap'd file without decoding it first. Group 1 is anchored to
+# the activation-bytes keyword; group 2 is the generic 8-hex fallback.
+AB_RE_BYTES = re.compile(
+    rb'(?:"?activation.?bytes"?["\s:=]+([0-9A-Fa-f]{8}))|(?:["\s]([0-9A-Fa-f]{8})(?=["\s]|$))',
+    re.IGNORECASE
+)
+
+# Common 8-hex tokens that are never real activation bytes (padding, test
+# values, color codes) - rejecting them avoids ffprobe tests per candidate
+AB_BLACKLIST = {'00000000', 'FFFFFFFF', 'DEADBEEF', '12345678', 'ABCDEF01',
+                '01234567', '89ABCDEF', '11111111', 'CAFEBABE'}
+
+# A generic 8-hex match only counts if "activation" appears shortly before it
+AB_CONTEXT_WINDOW = 64
+
+# Fixed key used by Audible's AAX key derivation (same constant ffmpeg uses)
+AAX_FIXED_KEY = bytes.fromhex('77214d4b196a87cd520045fd20a51d67')
+
+# Directory names that are large and never contain activation bytes
+SKIP_DIRS = {'node_modules', '.git', '__pycache__', '.venv', 'venv',
+             'Packages', '$Recycle.Bin', 'Temp', 'Cache', 'Caches'}
+
+def _prompt(name, secret=False):
+    """Resolve a credential without blocking in non-interactive runs.
+
+    Checks the AUDIBLE_<NAME> environment variable, then the [audible]
+    section of ~/.audible_extractor.ini, and only falls back to an
+    interactive prompt when stdin is a TTY.
+    """
+    value = os.environ.get(f"AUDIBLE_{name.upper()}")
+    if value:
+        return value.strip()
+
+    config = configparser.ConfigParser()
+    try:
+        config.read(_HOME / ".audible_extractor.ini")
+        value = config.get("audible", name, fallback=None)
+        if value:
+            return value.strip()
+    except configparser.Error:
+        pass
+
+    if not sys.stdin.isatty():
+        return None
+    if secret:
+        import getpass
+        return getpass.getpass(f"Enter your Audible {name}: ").strip()
+    return input(f"Enter your Audible {name}: ").strip()
+
+def _walk_ext(root, exts):
+    """Yield os.DirEntry objects under root whose extension is in exts.
+
+    Iterative os.scandir walker - one syscall per entry instead of the
+    stat-per-Path cost of rglob, and skips hidden/known-huge subtrees.
+    """
+    from collections import deque
+    pending = deque([str(root)])
+    while pending:
+        directory = pending.popleft()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name.startswith('.') or entry.name in SKIP_DIRS:
+                                continue
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            if entry.name.rpartition('.')[2].lower() in exts:
+                                yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
 class ActivationBytesExtractor:
     def __init__(self):
         self.activation_bytes = None
+        self._cli_available = None
+        self._test_aax = None
+        self._tested = {}
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
-    
+        # Reload cookies from previous runs so a still-valid Audible session
+        # doesn't have to re-authenticate from scratch
+        jar = MozillaCookieJar(str(SESSION_COOKIES_FILE))
+        try:
+            jar.load(ignore_discard=True)
+        except OSError:
+            pass
+        self.session.cookies = jar
+
+    def _save_session_cookies(self):
+        """Persist the session cookie jar for the next run"""
+        try:
+            self.session.cookies.save(ignore_discard=True)
+        except (OSError, AttributeError):
+            pass
+
+    def _audible_cli_auth_mtime(self):
+        """Get the mtime of the newest audible-cli auth file, or None"""
+        try:
+            auth_files = list((_HOME / ".audible").glob("*.json"))
+            if auth_files:
+                return max(f.stat().st_mtime for f in auth_files)
+        except OSError:
+            pass
+        return None
+
+    def _load_cached_cli_bytes(self):
+        """Load cached activation bytes if the auth file hasn't changed since"""
+        try:
+            with open(AB_CACHE_FILE, 'r') as f:
+                cache = json.load(f)
+            if cache.get('mtime') == self._audible_cli_auth_mtime() and cache.get('activation_bytes'):
+                return cache['activation_bytes']
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _save_cached_cli_bytes(self, activation_bytes):
+        """Cache activation bytes keyed on the auth file mtime"""
+        try:
+            with open(AB_CACHE_FILE, 'w') as f:
+                json.dump({'mtime': self._audible_cli_auth_mtime(),
+                           'activation_bytes': activation_bytes}, f)
+        except OSError:
+            pass
+
     def method_1_audible_cli(self):
         """Method 1: Use audible-cli if available"""
         print("\n=== Method 1: Audible-CLI ===")
+
+        # Re-runs can skip the subprocess entirely if nothing changed
+        cached = self._load_cached_cli_bytes()
+        if cached:
+            print(f"✅ Using cached activation bytes: {cached}")
+            return cached
+
         try:
-            # Check if audible-cli is available
-            result = subprocess.run(['py', '-m', 'audible_cli', '--version'], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode != 0:
+            # Check if audible-cli is importable (no subprocess needed just for this)
+            if self._cli_available is None:
+                self._cli_available = importlib.util.find_spec("audible_cli") is not None
+
+            if not self._cli_available:
                 print("❌ audible-cli not available")
                 return None
-            
+
             print("✓ audible-cli found, attempting to get activation bytes...")
-            
-            # Try to get activation bytes
-            result = subprocess.run(['py', '-m', 'audible_cli', 'activation-bytes'], 
-                                  capture_output=True, text=True, timeout=30)
-            
+
+            # Try to get activation bytes - capture raw bytes and decode only
+            # the small slice actually needed
+            result = subprocess.run(['py', '-m', 'audible_cli', 'activation-bytes'],
+                                  capture_output=True, timeout=30)
+
             if result.returncode == 0:
-                output = result.stdout.strip()
+                output = result.stdout[:512].decode('utf-8', 'replace').strip()
                 # Extract 8-character hex string from output
                 hex_match = re.search(r'\b([0-9A-Fa-f]{8})\b', output)
                 if hex_match:
                     activation_bytes = hex_match.group(1).upper()
                     print(f"✅ Success! Activation bytes: {activation_bytes}")
+                    self._save_cached_cli_bytes(activation_bytes)
                     return activation_bytes
                 else:
                     print(f"⚠️ Command succeeded but no activation bytes found in output: {output}")
             else:
-                print(f"❌ Command failed: {result.stderr}")
-                if "No such profile" in result.stderr or "auth file" in result.stderr:
+                stderr = result.stderr[:2048].decode('utf-8', 'replace')
+                print(f"❌ Command failed: {stderr}")
+                if "No such profile" in stderr or "auth file" in stderr:
                     print("💡 Hint: Run 'py -m audible_cli quickstart' to set up authentication first")
         
         except Exception as e:
@@ -65,33 +219,59 @@ class ActivationBytesExtractor:
     def method_2_manual_auth(self, email=None, password=None):
         """Method 2: Manual authentication with Audible"""
         print("\n=== Method 2: Manual Authentication ===")
-        
-        if not email:
-            email = input("Enter your Audible email: ").strip()
-        if not password:
-            import getpass
-            password = getpass.getpass("Enter your Audible password: ").strip()
-        
-        if not email or not password:
-            print("❌ Email and password required")
-            return None
-        
+
         try:
-            # Try to authenticate using audible library
             import audible
-            
-            print("🔐 Authenticating with Audible...")
-            
-            # Create authenticator
-            auth = audible.Authenticator.from_login(
-                username=email,
-                password=password,
-                locale="us",
-                with_username=False
-            )
-            
-            print("✓ Authentication successful!")
-            
+        except ImportError:
+            print("❌ 'audible' library not installed. Install with: pip install audible")
+            return None
+
+        auth = None
+
+        # Prefer a saved authenticator - re-login is slow and triggers captchas
+        if AUTH_FILE.exists():
+            try:
+                print("🔑 Reusing saved Audible authentication...")
+                auth = audible.Authenticator.from_file(AUTH_FILE)
+                # A refresh is one HTTP call; re-login is a full handshake
+                if getattr(auth, 'access_token_expired', False):
+                    print("🔄 Access token expired, refreshing...")
+                    auth.refresh_access_token()
+                    auth.to_file(AUTH_FILE)
+            except Exception as e:
+                print(f"⚠️ Could not reuse saved authentication: {e}")
+                auth = None
+
+        if auth is None:
+            if not email:
+                email = _prompt('email')
+            if not password:
+                password = _prompt('password', secret=True)
+
+            if not email or not password:
+                print("❌ Email and password required")
+                return None
+
+        try:
+            if auth is None:
+                print("🔐 Authenticating with Audible...")
+
+                # Create authenticator
+                auth = audible.Authenticator.from_login(
+                    username=email,
+                    password=password,
+                    locale="us",
+                    with_username=False
+                )
+
+                print("✓ Authentication successful!")
+
+                # Save for next time so warm runs skip the login round trips
+                try:
+                    auth.to_file(AUTH_FILE)
+                except Exception as e:
+                    print(f"⚠️ Could not save authentication: {e}")
+
             # Try to get activation bytes from auth object
             if hasattr(auth, 'activation_bytes') and auth.activation_bytes:
                 activation_bytes = auth.activation_bytes
@@ -100,10 +280,20 @@ class ActivationBytesExtractor:
             
             # Try alternative methods to get activation bytes
             client = audible.Client(auth=auth)
-            
+
+            def client_get(path, **params):
+                # Retry once after a token refresh rather than failing over
+                # to a full re-login
+                try:
+                    return client.get(path, **params)
+                except Exception:
+                    auth.refresh_access_token()
+                    auth.to_file(AUTH_FILE)
+                    return client.get(path, **params)
+
             # Method 2a: Check user profile for activation bytes
             try:
-                profile = client.get("1.0/customer/information")
+                profile = client_get("1.0/customer/information")
                 if 'activation_bytes' in profile:
                     activation_bytes = profile['activation_bytes']
                     print(f"✅ Activation bytes from profile: {activation_bytes}")
@@ -113,7 +303,7 @@ class ActivationBytesExtractor:
             
             # Method 2b: Try to get from library endpoint
             try:
-                library = client.get("1.0/library", num_results=1)
+                library = client_get("1.0/library", num_results=1)
                 # Sometimes activation bytes are in library metadata
                 for item in library.get('items', []):
                     if 'activation_bytes' in item:
@@ -126,8 +316,6 @@ class ActivationBytesExtractor:
             print("⚠️ Authentication successful but activation bytes not found in API response")
             print("💡 Try downloading a book to trigger activation bytes generation")
             
-        except ImportError:
-            print("❌ 'audible' library not installed. Install with: pip install audible")
         except Exception as e:
             print(f"❌ Authentication failed: {e}")
             if "2FA" in str(e) or "captcha" in str(e).lower():
@@ -141,10 +329,13 @@ class ActivationBytesExtractor:
         print("\n=== Method 2b: Selenium Authentication ===")
         
         try:
-            # Create Selenium extractor
+            # A fresh extractor per attempt: extract_activation_bytes
+            # quits its driver and closes its HTTP session on the way
+            # out, so there is no browser state worth keeping between
+            # retries anyway.
             use_firefox = (browser.lower() == 'firefox')
             extractor = SeleniumActivationExtractor(lang='de', debug=debug, use_firefox=use_firefox)
-            
+
             print("🔐 Using Selenium to authenticate with Audible...")
             
             activation_bytes, message = extractor.extract_activation_bytes(email, password)
@@ -157,8 +348,8 @@ class ActivationBytesExtractor:
                 if "captcha" in message.lower() or "2fa" in message.lower():
                     print("💡 Try running with debug=True for manual login")
                     
-                    # Offer debug mode
-                    if not debug:
+                    # Offer debug mode (only when someone is at the terminal)
+                    if not debug and sys.stdin.isatty():
                         retry = input("Would you like to try debug mode for manual login? (y/n): ").strip().lower()
                         if retry == 'y':
                             return self.method_2b_selenium_auth(email, password, browser=browser, debug=True)
@@ -176,11 +367,11 @@ class ActivationBytesExtractor:
         print("\n=== Method 3: File Search ===")
         
         search_locations = [
-            Path.home() / "AppData" / "Roaming" / "Audible",
-            Path.home() / "AppData" / "Local" / "Audible",
-            Path.home() / "AppData" / "Roaming" / "AudibleDownloadManager",
-            Path.home() / "Documents",
-            Path.home() / "Downloads",
+            _HOME / "AppData" / "Roaming" / "Audible",
+            _HOME / "AppData" / "Local" / "Audible",
+            _HOME / "AppData" / "Roaming" / "AudibleDownloadManager",
+            _HOME / "Documents",
+            _HOME / "Downloads",
             Path(".")
         ]
         
@@ -193,46 +384,47 @@ class ActivationBytesExtractor:
             print(f"🔍 Searching in: {location}")
             
             try:
-                for file_path in location.rglob("*"):
-                    if not file_path.is_file():
-                        continue
-                    
-                    if file_path.suffix.lower() not in ['.json', '.txt', '.log', '.cfg', '.ini', '.xml']:
-                        continue
-                    
+                for entry in _walk_ext(location, {'json', 'txt', 'log', 'cfg', 'ini', 'xml'}):
                     try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                        
-                        # Look for activation bytes patterns
-                        patterns = [
-                            r'activation.?bytes["\s:=]+([0-9A-Fa-f]{8})',
-                            r'"activation.?bytes"["\s:=]+([0-9A-Fa-f]{8})',
-                            r'["\s]([0-9A-Fa-f]{8})["\s]',
-                        ]
-                        
-                        for pattern in patterns:
-                            matches = re.findall(pattern, content, re.IGNORECASE)
-                            for match in matches:
-                                if len(match) == 8:
-                                    found_bytes.add(match.upper())
-                                    print(f"  ✓ Found: {match.upper()} in {file_path.name}")
-                    
+                        # Skip empty files and anything too big to plausibly
+                        # be a config file (bounds worst-case I/O)
+                        size = entry.stat().st_size
+                        if size == 0 or size > MAX_SEARCH_FILE_SIZE:
+                            continue
+                        # mmap the file so the regex runs over the OS page
+                        # cache - no full read or utf-8 decode of the content
+                        with open(entry.path, 'rb') as f:
+                            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                                # Look for activation bytes patterns (single pass)
+                                for m in AB_RE_BYTES.finditer(mm):
+                                    keyword_match = m.group(1)
+                                    if keyword_match is None:
+                                        # Generic 8-hex match - require the word
+                                        # "activation" nearby, otherwise it's
+                                        # likely a git hash / UUID fragment
+                                        window = mm[max(0, m.start() - AB_CONTEXT_WINDOW):m.start()]
+                                        if b'activation' not in window.lower():
+                                            continue
+                                    value = (keyword_match or m.group(2)).decode('ascii').upper()
+                                    if value in AB_BLACKLIST or value in found_bytes:
+                                        continue
+                                    found_bytes.add(value)
+                                    print(f"  ✓ Found: {value} in {entry.name}")
+                                    # Test immediately - a hit ends the walk
+                                    # without scanning the remaining locations
+                                    if self.test_activation_bytes(value):
+                                        print(f"✅ Working activation bytes: {value}")
+                                        return value
+
                     except:
                         continue
             except:
                 continue
         
         if found_bytes:
-            # Test each found activation bytes
-            for bytes_val in found_bytes:
-                if self.test_activation_bytes(bytes_val):
-                    print(f"✅ Working activation bytes: {bytes_val}")
-                    return bytes_val
-            
             print("⚠️ Found potential activation bytes but none tested successfully")
             return list(found_bytes)[0]  # Return first one found
-        
+
         print("❌ No activation bytes found in files")
         return None
     
@@ -267,38 +459,94 @@ class ActivationBytesExtractor:
         
         return None
     
+    def _check_aax_checksum(self, aax_path, activation_bytes):
+        """Verify activation bytes against the checksum in the AAX adrm atom.
+
+        Uses the same SHA-1 derivation ffmpeg performs when decrypting, so
+        no subprocess is needed. Returns True/False, or None if the header
+        could not be parsed (caller should fall back to ffprobe).
+        """
+        try:
+            ab = bytes.fromhex(activation_bytes)
+        except ValueError:
+            return False
+        if len(ab) != 4:
+            return False
+
+        try:
+            with open(aax_path, 'rb') as f:
+                header = f.read(4096)
+        except OSError:
+            return None
+
+        pos = header.find(b'adrm')
+        if pos == -1:
+            return None
+        # adrm payload layout (per ffmpeg's mov_read_adrm): 8 unknown
+        # bytes, the 56-byte encrypted DRM blob, 4 more unknown bytes,
+        # then the 20-byte file checksum - offset 72 from the tag.
+        file_checksum = header[pos + 72:pos + 92]
+        if len(file_checksum) != 20:
+            return None
+
+        intermediate_key = hashlib.sha1(AAX_FIXED_KEY + ab).digest()
+        intermediate_iv = hashlib.sha1(AAX_FIXED_KEY + intermediate_key + ab).digest()
+        calculated = hashlib.sha1(intermediate_key[:16] + intermediate_iv[:16]).digest()
+        return calculated == file_checksum
+
     def test_activation_bytes(self, activation_bytes):
         """Test activation bytes with a sample .aax file"""
+        # Each value is tested at most once per process
+        cached = self._tested.get(activation_bytes)
+        if cached is not None:
+            return cached
+        result = self._test_activation_bytes_uncached(activation_bytes)
+        self._tested[activation_bytes] = result
+        return result
+
+    def _test_activation_bytes_uncached(self, activation_bytes):
         print(f"🧪 Testing activation bytes: {activation_bytes}")
         
-        # Look for .aax files to test with
-        test_locations = [
-            Path.home() / "Documents",
-            Path.home() / "Downloads",
-            Path.home() / "Music",
-            Path(".")
-        ]
-        
-        aax_files = []
-        for location in test_locations:
-            if location.exists():
-                aax_files.extend(list(location.rglob("*.aax")))
-        
-        if not aax_files:
-            print("  ⚠️ No .aax files found for testing")
-            return False
-        
-        test_file = aax_files[0]
+        # Look for .aax files to test with (found once, reused across candidates)
+        if self._test_aax is None:
+            test_locations = [
+                _HOME / "Documents",
+                _HOME / "Downloads",
+                _HOME / "Music",
+                Path(".")
+            ]
+
+            # Early-exit generator: the walk stops at the first .aax found
+            self._test_aax = next(
+                (p for loc in test_locations if loc.exists() for p in loc.rglob("*.aax")),
+                None
+            )
+            if self._test_aax is None:
+                print("  ⚠️ No .aax files found for testing")
+                return False
+
+        test_file = self._test_aax
         print(f"  📁 Testing with: {test_file.name}")
-        
+
+        # Fast path: verify against the checksum stored in the AAX header
+        # in-process (~ms) instead of spawning ffprobe (~hundreds of ms)
+        header_result = self._check_aax_checksum(test_file, activation_bytes)
+        if header_result is not None:
+            if header_result:
+                print("  ✅ Success! Activation bytes match the file checksum")
+            else:
+                print("  ❌ Activation bytes do not match the file checksum")
+            return header_result
+
         try:
             # Try to get file info using ffprobe with activation bytes
             cmd = [
                 'ffprobe',
+                '-hide_banner', '-nostdin',
                 '-activation_bytes', activation_bytes,
                 '-v', 'quiet',
-                '-print_format', 'json',
-                '-show_format',
+                '-select_streams', 'a:0',
+                '-show_entries', 'format=duration',
                 str(test_file)
             ]
             
@@ -316,18 +564,28 @@ class ActivationBytesExtractor:
             return False
     
     def save_activation_bytes(self, activation_bytes):
-        """Save activation bytes to file"""
+        """Save activation bytes to file (atomically, and only if changed)"""
         if activation_bytes:
             # Save to multiple locations for convenience
             files_to_save = [
                 'activation_bytes.txt',
-                Path.home() / 'activation_bytes.txt'
+                _HOME / 'activation_bytes.txt'
             ]
-            
+
             for file_path in files_to_save:
                 try:
-                    with open(file_path, 'w') as f:
+                    # Skip the write when the stored value is already current
+                    try:
+                        if Path(file_path).read_text().strip() == activation_bytes:
+                            continue
+                    except OSError:
+                        pass
+                    # Write to a sibling temp file and rename so a crash
+                    # can't leave a truncated file behind
+                    tmp_path = f"{file_path}.tmp"
+                    with open(tmp_path, 'w') as f:
                         f.write(activation_bytes)
+                    os.replace(tmp_path, file_path)
                     print(f"💾 Saved to: {file_path}")
                 except:
                     continue
@@ -336,15 +594,45 @@ class ActivationBytesExtractor:
         """Main extraction method - tries all methods"""
         print("🎯 Audible Activation Bytes Extractor")
         print("=" * 50)
-        
+
+        # Methods 1 and 3 are non-interactive and I/O bound - run them
+        # concurrently and take the first hit. No context manager: its
+        # __exit__ is shutdown(wait=True), which would block the winner
+        # on the loser finishing (cancel() can't stop a running future),
+        # so the loser is abandoned with a non-waiting shutdown instead.
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        try:
+            futures = {
+                executor.submit(self.method_1_audible_cli): 'audible-cli',
+                executor.submit(self.method_3_file_search): 'file search'
+            }
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                if result:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self.activation_bytes = result
+                    self.save_activation_bytes(result)
+                    self._save_session_cookies()
+                    print(f"\n🎉 SUCCESS! Activation bytes: {result} (via {futures[future]})")
+                    return result
+            executor.shutdown(wait=False)
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            print("\n\n⏹️ Extraction cancelled by user")
+            return None
+        except Exception as e:
+            executor.shutdown(wait=False, cancel_futures=True)
+            print(f"❌ Concurrent extraction phase failed: {e}")
+
+        # Interactive methods stay serial
         methods = [
-            self.method_1_audible_cli,
             lambda: self.method_2_manual_auth(email, password) if email and password else None,
             lambda: self.method_2b_selenium_auth(email, password) if email and password else None,
-            self.method_3_file_search,
-            self.method_4_browser_extraction
         ]
-        
+        # The browser walkthrough is all prompts - pointless without a TTY
+        if sys.stdin.isatty():
+            methods.append(self.method_4_browser_extraction)
+
         for i, method in enumerate(methods, 1):
             try:
                 if method is None:
@@ -356,6 +644,7 @@ class ActivationBytesExtractor:
                 if result:
                     self.activation_bytes = result
                     self.save_activation_bytes(result)
+                    self._save_session_cookies()
                     print(f"\n🎉 SUCCESS! Activation bytes: {result}")
                     return result
                     
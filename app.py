@@ -2,16 +2,31 @@ import os
 import tempfile
 import shutil
 import logging
-from flask import Flask, request, jsonify, send_file, render_template
+import functools
+from flask import Flask, request, jsonify, send_from_directory, render_template, Response, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import NotFound
 import subprocess
 import zipfile
+import concurrent.futures
+import glob
+import json
+import threading
+import uuid
+import re
+import collections
+import hashlib
 try:
     from mutagen import File
     MUTAGEN_AVAILABLE = True
 except ImportError:
     MUTAGEN_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 import math
 from datetime import datetime
 from dotenv import load_dotenv
@@ -26,10 +41,30 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
-# Configuration
-UPLOAD_FOLDER = 'uploads'
-OUTPUT_FOLDER = 'output'
-ALLOWED_EXTENSIONS = {'aax', 'aa'}
+if ORJSON_AVAILABLE:
+    # Swap Flask's stdlib json encoder for orjson's native one - jsonify
+    # and request.get_json() pick it up automatically
+    from flask.json.provider import JSONProvider
+
+    class ORJSONProvider(JSONProvider):
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = ORJSONProvider(app)
+
+# Behind nginx/Apache this hands downloads off to the web server's
+# sendfile(2) instead of streaming them through Python
+app.use_x_sendfile = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+
+# Configuration. Folder paths are resolved to absolute once at import so
+# every later join is a plain string concat, independent of the cwd
+_HERE = os.path.dirname(os.path.abspath(__file__))
+UPLOAD_FOLDER = os.path.join(_HERE, 'uploads')
+OUTPUT_FOLDER = os.path.join(_HERE, 'output')
+ALLOWED_EXTENSIONS = ('.aax', '.aa')
 MAX_CHUNK_SIZE_MB = 24
 MAX_CHUNK_SIZE_BYTES = MAX_CHUNK_SIZE_MB * 1024 * 1024
 
@@ -37,50 +72,214 @@ MAX_CHUNK_SIZE_BYTES = MAX_CHUNK_SIZE_MB * 1024 * 1024
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
+# Background conversion jobs. The heavy lifting happens inside ffmpeg
+# subprocesses, so worker threads spend their time blocked on I/O and
+# jobs genuinely convert in parallel. Half the cores keeps headroom for
+# the internally-threaded ffmpeg processes themselves
+_CONVERSION_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=max(1, (os.cpu_count() or 2) // 2))
+_CONVERSION_JOBS = {}
+_CONVERSION_JOBS_LOCK = threading.Lock()
+
+# Unlinking a multi-GB temp tree can block on filesystem metadata work;
+# hand deletions to a small pool so HTTP responses don't wait on them
+_CLEANUP_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+def _remove_temp_dir(temp_dir):
+    try:
+        shutil.rmtree(temp_dir)
+        app.logger.info(f"Successfully cleaned up temporary directory: {temp_dir}")
+    except Exception as e:
+        app.logger.error(f"Failed to clean up temporary directory {temp_dir}: {e}")
+
+def schedule_temp_cleanup(temp_dir):
+    """Delete a temporary directory in the background"""
+    if temp_dir and os.path.exists(temp_dir):
+        _CLEANUP_EXECUTOR.submit(_remove_temp_dir, temp_dir)
+
+# Activation bytes live in a small text file; cache them in memory so the
+# load/save endpoints don't hit the filesystem on every call
+ACTIVATION_BYTES_FILE = 'activation_bytes.txt'
+ACTIVATION_BYTES_RE = re.compile(r'^[0-9A-Fa-f]{8}$')
+_activation_bytes_cache = None
+_activation_bytes_lock = threading.Lock()
+
+def load_saved_activation_bytes():
+    """Return saved activation bytes, reading the file only on first access"""
+    global _activation_bytes_cache
+    with _activation_bytes_lock:
+        if _activation_bytes_cache is None and os.path.exists(ACTIVATION_BYTES_FILE):
+            with open(ACTIVATION_BYTES_FILE, 'r') as f:
+                _activation_bytes_cache = f.read().strip()
+        return _activation_bytes_cache
+
+def store_activation_bytes(activation_bytes):
+    """Write activation bytes to file and refresh the in-memory cache"""
+    global _activation_bytes_cache
+    with _activation_bytes_lock:
+        with open(ACTIVATION_BYTES_FILE, 'w') as f:
+            f.write(activation_bytes)
+        _activation_bytes_cache = activation_bytes
+
+# Re-uploading the same book is common; remember what each upload
+# converted to so duplicates skip the multi-minute ffmpeg run entirely
+_DEDUP_CACHE = {}
+_DEDUP_CACHE_LOCK = threading.Lock()
+
+def _upload_digest(path):
+    """Fingerprint an upload by its size plus first and last MB.
+
+    BLAKE2b over 2 MB runs in ~10 ms regardless of book size - enough to
+    identify a re-uploaded AAX (whose DRM headers sit at both ends)
+    without reading gigabytes.
+    """
+    size = os.path.getsize(path)
+    h = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, 'rb') as f:
+        h.update(f.read(1024 * 1024))
+        if size > 2 * 1024 * 1024:
+            f.seek(-1024 * 1024, os.SEEK_END)
+        h.update(f.read(1024 * 1024))
+    return h.hexdigest()
+
+def _find_cached_output(digest, output_format):
+    """Return a previously converted filename for this upload, if it still exists"""
+    with _DEDUP_CACHE_LOCK:
+        final_filename = _DEDUP_CACHE.get((digest, output_format))
+    if final_filename and os.path.exists(os.path.join(OUTPUT_FOLDER, final_filename)):
+        return final_filename
+    return None
+
+def _record_cached_output(digest, output_format, final_filename):
+    with _DEDUP_CACHE_LOCK:
+        _DEDUP_CACHE[(digest, output_format)] = final_filename
+
+def _copy_upload_stream(src, dst):
+    """Copy an upload stream into an open output file.
+
+    Large uploads arrive as a SpooledTemporaryFile already rolled to
+    disk; os.sendfile moves those bytes kernel-side without ever
+    touching userspace buffers. Small in-memory spools (and platforms
+    without sendfile) fall back to a buffered copy. Either way the file
+    is truncated to the copied length, trimming any preallocation
+    overshoot.
+    """
+    # fileno() on an un-rolled spool would force it to disk first, which
+    # defeats the point for small uploads - only use fds that already exist
+    if hasattr(os, 'sendfile') and getattr(src, '_rolled', True):
+        try:
+            src_fd = src.fileno()
+        except (AttributeError, OSError):
+            src_fd = None
+        if src_fd is not None:
+            dst.flush()
+            dst_fd = dst.fileno()
+            offset = 0
+            while True:
+                sent = os.sendfile(dst_fd, src_fd, offset, 4 * 1024 * 1024)
+                if sent == 0:
+                    os.ftruncate(dst_fd, offset)
+                    return offset
+                offset += sent
+
+    shutil.copyfileobj(src, dst, length=4 * 1024 * 1024)
+    dst.truncate()
+    return dst.tell()
+
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    # endswith with a tuple is one right-to-left scan, no split/allocation
+    return filename.lower().endswith(ALLOWED_EXTENSIONS)
 
 def get_file_size_mb(filepath):
     """Get file size in MB"""
     return os.path.getsize(filepath) / (1024 * 1024)
 
+# Resolve the FFmpeg/FFprobe commands once at import - the bundled copy
+# wins, otherwise fall back to the system PATH
+_LOCAL_FFMPEG = os.path.join(_HERE, 'ffmpeg', 'ffmpeg.exe')
+_LOCAL_FFPROBE = os.path.join(_HERE, 'ffmpeg', 'ffprobe.exe')
+
+if os.path.exists(_LOCAL_FFMPEG) and os.path.exists(_LOCAL_FFPROBE):
+    _FFMPEG_CMD, _FFPROBE_CMD = _LOCAL_FFMPEG, _LOCAL_FFPROBE
+else:
+    _FFMPEG_CMD, _FFPROBE_CMD = 'ffmpeg', 'ffprobe'
+
+# Spread decode/filter/encode across all cores - ffmpeg doesn't always
+# detect the core count on its own inside containers
+_FFMPEG_THREAD_FLAGS = ['-threads', str(os.cpu_count() or 1),
+                        '-filter_threads', str(os.cpu_count() or 1)]
+
+@functools.lru_cache(maxsize=1)
 def check_ffmpeg_availability():
-    """Check if FFmpeg and FFprobe are available"""
-    try:
-        # Check for local FFmpeg installation first (faster)
-        local_ffmpeg = os.path.join(os.path.dirname(__file__), 'ffmpeg', 'ffmpeg.exe')
-        local_ffprobe = os.path.join(os.path.dirname(__file__), 'ffmpeg', 'ffprobe.exe')
-        
-        if os.path.exists(local_ffmpeg) and os.path.exists(local_ffprobe):
-            # Quick test to make sure they work
-            result = subprocess.run([local_ffmpeg, '-version'], capture_output=True, timeout=3)
-            if result.returncode == 0:
-                return True, None
-        
-        # Fallback to system PATH (with timeout)
-        subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True, timeout=3)
-        subprocess.run(['ffprobe', '-version'], capture_output=True, check=True, timeout=3)
+    """Check if FFmpeg and FFprobe are available (resolved once per process)"""
+    # A PATH walk is enough to know the binaries exist - no need to fork
+    # two processes and sit through their startup (worst case 2 x 3 s).
+    # The bundled copies were already existence-checked at import
+    if os.path.isabs(_FFMPEG_CMD):
         return True, None
-        
-    except Exception as e:
-        return False, f"FFmpeg is not available: {str(e)}"
+    if shutil.which(_FFMPEG_CMD) and shutil.which(_FFPROBE_CMD):
+        return True, None
+    return False, "FFmpeg is not available: ffmpeg/ffprobe not found on PATH"
 
 def get_ffmpeg_commands():
-    """Get the appropriate FFmpeg and FFprobe commands (system or local)"""
-    # Check for local FFmpeg first (since we know it's there)
-    local_ffmpeg = os.path.join(os.path.dirname(__file__), 'ffmpeg', 'ffmpeg.exe')
-    local_ffprobe = os.path.join(os.path.dirname(__file__), 'ffmpeg', 'ffprobe.exe')
-    
-    if os.path.exists(local_ffmpeg) and os.path.exists(local_ffprobe):
-        return local_ffmpeg, local_ffprobe
-    
-    # Fallback to system commands
-    return 'ffmpeg', 'ffprobe'
+    """Get the resolved FFmpeg and FFprobe commands (local bundle or system)"""
+    return _FFMPEG_CMD, _FFPROBE_CMD
+
+def run_ffmpeg_bounded(cmd, timeout=900):
+    """Run an ffmpeg command keeping only the tail of its stderr.
+
+    stderr is drained as it arrives into a bounded deque, so even a
+    pathologically chatty run can't grow Python memory with the length
+    of the audiobook - roughly the last 64 KB survive for error
+    reporting. Returns (returncode, stderr_tail_bytes).
+    """
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    ring = collections.deque(maxlen=512)
+
+    def drain():
+        for line in proc.stderr:
+            ring.append(line)
+
+    drainer = threading.Thread(target=drain, daemon=True)
+    drainer.start()
+    try:
+        returncode = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        raise
+    drainer.join()
+    return returncode, b''.join(ring)
+
+# Probe eagerly at import: a missing ffmpeg fails loudly at startup and
+# the conversion paths check a plain constant instead of re-entering the
+# cached prober on every call
+FFMPEG_OK, FFMPEG_ERROR = check_ffmpeg_availability()
 
 def convert_audible_file(input_file, output_dir, activation_bytes=None, output_format='mp3'):
     """Convert Audible file to specified format using ffmpeg with fallback methods"""
     app.logger.info(f"Starting conversion of {input_file} to {output_format}")
-    
+
+    # On multi-core machines, encode MP3 segments in parallel first -
+    # libmp3lame is single-threaded, so the standard path leaves most
+    # cores idle during the dominant encode phase
+    if output_format.lower() == 'mp3' and (os.cpu_count() or 1) > 1:
+        try:
+            app.logger.info("Attempting parallel segmented conversion...")
+            return _convert_with_parallel_segments(input_file, output_dir, activation_bytes)
+        except Exception as e:
+            app.logger.warning(f"Parallel segmented conversion failed: {str(e)}")
+
+    # M4B keeps the source's AAC codec, so try a pure remux before
+    # paying for a decode/encode cycle
+    if output_format.lower() == 'm4b':
+        try:
+            app.logger.info("Attempting direct AAC remux to M4B...")
+            return _remux_to_m4b(input_file, output_dir, activation_bytes)
+        except Exception as e:
+            app.logger.warning(f"Direct remux failed, falling back to re-encode: {str(e)}")
+
     # First try the standard method
     try:
         app.logger.info("Attempting standard conversion method...")
@@ -97,141 +296,199 @@ def convert_audible_file(input_file, output_dir, activation_bytes=None, output_f
             app.logger.error(f"All conversion methods failed. Standard error: {str(e)}, Fallback error: {str(fallback_error)}")
             raise Exception(f"All conversion methods failed. This .aax file may use an incompatible DRM scheme or be corrupted. Last error: {str(fallback_error)}")
 
-def _convert_with_standard_method(input_file, output_dir, activation_bytes=None, output_format='mp3'):
-    """Standard conversion method"""
-    app.logger.info(f"*** STARTING STANDARD CONVERSION: {input_file} to {output_format} ***")
-    
-    # Check if FFmpeg is available
-    ffmpeg_available, error_msg = check_ffmpeg_availability()
-    if not ffmpeg_available:
-        raise Exception(f"FFmpeg is required but not available: {error_msg}. Please install FFmpeg from https://ffmpeg.org/download.html and add it to your system PATH.")
-    
+def _remux_to_m4b(input_file, output_dir, activation_bytes=None):
+    """Remux the decrypted AAC stream into M4B without re-encoding.
+
+    After activation-bytes decryption the payload is already AAC, so a
+    container rewrite runs near disk speed and preserves the original
+    quality. Exotic streams the mp4 muxer rejects fall back to the
+    re-encoding paths in the caller.
+    """
+    if not FFMPEG_OK:
+        raise Exception(f"FFmpeg is required but not available: {FFMPEG_ERROR}")
+
     base_name = os.path.splitext(os.path.basename(input_file))[0]
-    temp_output = os.path.join(output_dir, f"{base_name}_temp.{output_format}")
-    
-    # Get the correct FFmpeg command
+    temp_output = os.path.join(output_dir, f"{base_name}_temp.m4b")
     ffmpeg_cmd, _ = get_ffmpeg_commands()
-    
-    # Build ffmpeg command - activation_bytes MUST come before -i
-    cmd = [ffmpeg_cmd]
+
+    cmd = [ffmpeg_cmd, '-nostats', '-loglevel', 'error']
     if activation_bytes and input_file.lower().endswith('.aax'):
         cmd.extend(['-activation_bytes', activation_bytes])
-    
-    # Add error resilience flags to handle AAC decoding issues
-    cmd.extend(['-err_detect', 'ignore_err', '-fflags', '+igndts+ignidx'])
-    cmd.extend(['-i', input_file])
-    
-    # Set codec and options based on output format
-    if output_format.lower() == 'mp3':
-        cmd.extend(['-c:a', 'libmp3lame', '-b:a', '128k'])
-    elif output_format.lower() == 'm4b':
-        # M4B format with AAC codec, preserving chapters
-        cmd.extend(['-c:a', 'aac', '-b:a', '128k', '-c:v', 'copy'])
-    else:
-        raise Exception(f"Unsupported output format: {output_format}")
-    
-    cmd.extend([temp_output, '-y'])
-    
-    app.logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
-    
-    # Run conversion with proper stdin handling, encoding, and timeout
-    result = subprocess.run(cmd, capture_output=True, text=True, check=False, 
-                          stdin=subprocess.DEVNULL, timeout=900, 
-                          encoding='utf-8', errors='replace')  # Handle encoding issues
-    
+    cmd.extend(['-i', input_file,
+                '-c:a', 'copy', '-c:v', 'copy',
+                '-movflags', '+faststart', '-f', 'mp4',
+                temp_output, '-y'])
+
+    app.logger.info(f"Running remux command: {' '.join(cmd)}")
+    returncode, stderr_bytes = run_ffmpeg_bounded(cmd, timeout=900)
+    if returncode != 0:
+        raise Exception(f"M4B remux failed: {stderr_bytes[-4096:].decode('utf-8', 'replace')}")
+
+    app.logger.info("Direct AAC remux to M4B successful.")
+    return temp_output
+
+def _convert_with_parallel_segments(input_file, output_dir, activation_bytes=None):
+    """Convert to MP3 by encoding decrypted segments on all cores.
+
+    Three passes: cut the source's AAC stream into ~10-minute pieces
+    with stream copy (no decode), encode each piece to MP3 on its own
+    core, then join the results with the concat demuxer (stream copy
+    again). Only the middle pass does real work, and it runs one
+    libmp3lame per core instead of a single-threaded encode.
+    """
+    if not FFMPEG_OK:
+        raise Exception(f"FFmpeg is required but not available: {FFMPEG_ERROR}")
+
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    ffmpeg_cmd, _ = get_ffmpeg_commands()
+
+    seg_dir = os.path.join(output_dir, 'segments')
+    os.makedirs(seg_dir, exist_ok=True)
+
+    # Pass 1: decrypt and cut without re-encoding
+    cmd = [ffmpeg_cmd, '-nostats', '-loglevel', 'error']
+    if activation_bytes and input_file.lower().endswith('.aax'):
+        cmd.extend(['-activation_bytes', activation_bytes])
+    cmd.extend(['-i', input_file, '-vn', '-c:a', 'copy',
+                '-f', 'segment', '-segment_time', '600',
+                os.path.join(seg_dir, 'raw_%03d.m4a'), '-y'])
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            stdin=subprocess.DEVNULL, timeout=900)
     if result.returncode != 0:
-        app.logger.error(f"FFmpeg command failed with return code {result.returncode}")
-        app.logger.error(f"FFmpeg stdout: {result.stdout}")
-        app.logger.error(f"FFmpeg stderr: {result.stderr}")
-        
-        # Provide more helpful error messages
-        error_msg = "FFmpeg conversion failed"
-        if result.stderr:
-            if "activation_bytes" in result.stderr.lower():
-                error_msg = "Invalid activation bytes - please check your activation bytes are correct for this file"
-            elif "invalid data" in result.stderr.lower():
-                error_msg = "Invalid or corrupted audio file - the .aax file may be damaged"
-            else:
-                error_msg = f"FFmpeg error: {result.stderr}"
-        elif result.returncode == 4294967274:  # Common Windows error code
-            error_msg = "FFmpeg process was terminated - this may be due to encoding issues or wrong activation bytes"
-        
-        raise Exception(error_msg)
-    
-    app.logger.info(f"FFmpeg conversion to {output_format.upper()} successful.")
+        raise Exception(f"Segment pass failed: {result.stderr[:500].decode('utf-8', 'replace')}")
+
+    segments = sorted(glob.glob(os.path.join(seg_dir, 'raw_*.m4a')))
+    if not segments:
+        raise Exception("Segment pass produced no output")
+
+    # Pass 2: one single-threaded libmp3lame per core
+    def encode_one(segment):
+        mp3_path = f"{os.path.splitext(segment)[0]}.mp3"
+        encode_cmd = [ffmpeg_cmd, '-nostats', '-loglevel', 'error',
+                      '-i', segment, '-c:a', 'libmp3lame', '-b:a', '128k',
+                      mp3_path, '-y']
+        encode_result = subprocess.run(encode_cmd, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.PIPE,
+                                       stdin=subprocess.DEVNULL, timeout=900)
+        if encode_result.returncode != 0:
+            raise Exception(f"Segment encode failed: "
+                            f"{encode_result.stderr[:500].decode('utf-8', 'replace')}")
+        return mp3_path
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        mp3_segments = list(executor.map(encode_one, segments))
+
+    # Pass 3: stitch the encoded pieces back together
+    list_path = os.path.join(seg_dir, 'concat.txt')
+    with open(list_path, 'w') as f:
+        for mp3_path in mp3_segments:
+            f.write(f"file '{mp3_path}'\n")
+
+    temp_output = os.path.join(output_dir, f"{base_name}_temp.mp3")
+    cmd = [ffmpeg_cmd, '-nostats', '-loglevel', 'error',
+           '-f', 'concat', '-safe', '0', '-i', list_path,
+           '-c', 'copy', temp_output, '-y']
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            stdin=subprocess.DEVNULL, timeout=900)
+    if result.returncode != 0:
+        raise Exception(f"Concat pass failed: {result.stderr[:500].decode('utf-8', 'replace')}")
+
+    app.logger.info(f"Parallel segmented conversion succeeded ({len(segments)} segments)")
     return temp_output
 
-def _convert_with_standard_method_DISABLED(input_file, output_dir, activation_bytes=None, output_format='mp3'):
-    """Standard conversion method"""
-    # Check if FFmpeg is available
-    ffmpeg_available, error_msg = check_ffmpeg_availability()
-    if not ffmpeg_available:
-        raise Exception(f"FFmpeg is required but not available: {error_msg}. Please install FFmpeg from https://ffmpeg.org/download.html and add it to your system PATH.")
-    
+def _build_standard_cmd(input_file, output_dir, activation_bytes=None, output_format='mp3'):
+    """Build the standard conversion command; returns (cmd, temp_output)"""
     base_name = os.path.splitext(os.path.basename(input_file))[0]
     temp_output = os.path.join(output_dir, f"{base_name}_temp.{output_format}")
-    
+
     # Get the correct FFmpeg command
     ffmpeg_cmd, _ = get_ffmpeg_commands()
-    
-    # Build ffmpeg command - activation_bytes MUST come before -i
-    cmd = [ffmpeg_cmd]
+
+    # Build ffmpeg command - activation_bytes MUST come before -i. The
+    # quiet flags stop ffmpeg from streaming per-frame progress into our
+    # captured stderr; it only speaks up on real errors
+    cmd = [ffmpeg_cmd, '-nostats', '-loglevel', 'error']
     if activation_bytes and input_file.lower().endswith('.aax'):
         cmd.extend(['-activation_bytes', activation_bytes])
-    
+
+    # Add error resilience flags to handle AAC decoding issues
+    cmd.extend(['-err_detect', 'ignore_err', '-fflags', '+igndts+ignidx'])
+    # AAX has a fixed MP4 box layout, so 32 KB is plenty for format
+    # detection - don't let ffmpeg ingest its much larger default probe
+    # window before the first decoded byte. The fallback strategies keep
+    # their generous probesize for genuinely malformed files
+    cmd.extend(['-probesize', '32k', '-analyzeduration', '0'])
     cmd.extend(['-i', input_file])
-    
+    cmd.extend(_FFMPEG_THREAD_FLAGS)
+
     # Set codec and options based on output format
     if output_format.lower() == 'mp3':
         cmd.extend(['-c:a', 'libmp3lame', '-b:a', '128k'])
     elif output_format.lower() == 'm4b':
-        # M4B format with AAC codec, preserving chapters
-        cmd.extend(['-c:a', 'aac', '-b:a', '128k', '-c:v', 'copy'])
+        # M4B format with AAC codec, preserving chapters. faststart moves
+        # the moov atom to the front so players (and our splitter) can
+        # seek without reading to the end of the file first
+        cmd.extend(['-c:a', 'aac', '-b:a', '128k', '-c:v', 'copy',
+                    '-movflags', '+faststart'])
     else:
         raise Exception(f"Unsupported output format: {output_format}")
-    
+
     cmd.extend([temp_output, '-y'])
-    
+    return cmd, temp_output
+
+def _convert_with_standard_method(input_file, output_dir, activation_bytes=None, output_format='mp3'):
+    """Standard conversion method"""
+    app.logger.info(f"*** STARTING STANDARD CONVERSION: {input_file} to {output_format} ***")
+
+    # Check if FFmpeg is available
+    if not FFMPEG_OK:
+        raise Exception(f"FFmpeg is required but not available: {FFMPEG_ERROR}. Please install FFmpeg from https://ffmpeg.org/download.html and add it to your system PATH.")
+
+    cmd, temp_output = _build_standard_cmd(input_file, output_dir, activation_bytes, output_format)
+
     app.logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
-    
-    # Run conversion with proper stdin handling, encoding, and timeout
-    result = subprocess.run(cmd, capture_output=True, text=True, check=False, 
-                          stdin=subprocess.DEVNULL, timeout=900, 
-                          encoding='utf-8', errors='replace')  # Handle encoding issues
-    
-    if result.returncode != 0:
-        app.logger.error(f"FFmpeg command failed with return code {result.returncode}")
-        app.logger.error(f"FFmpeg stdout: {result.stdout}")
-        app.logger.error(f"FFmpeg stderr: {result.stderr}")
-        
+
+    # Run conversion with bounded stderr capture; the tail stays as raw
+    # bytes and is only decoded on the failure path
+    returncode, stderr_bytes = run_ffmpeg_bounded(cmd, timeout=900)
+
+    if returncode != 0:
+        # The closing error lines are all that matter - decode only the
+        # last 4 KB of the tail for the substring checks and the log
+        stderr = stderr_bytes[-4096:].decode('utf-8', 'replace')
+        app.logger.error(f"FFmpeg command failed with return code {returncode}")
+        app.logger.error(f"FFmpeg stderr: {stderr}")
+
         # Provide more helpful error messages
         error_msg = "FFmpeg conversion failed"
-        if result.stderr:
-            if "activation_bytes" in result.stderr.lower():
+        if stderr:
+            if "activation_bytes" in stderr.lower():
                 error_msg = "Invalid activation bytes - please check your activation bytes are correct for this file"
-            elif "invalid data" in result.stderr.lower():
+            elif "invalid data" in stderr.lower():
                 error_msg = "Invalid or corrupted audio file - the .aax file may be damaged"
             else:
-                error_msg = f"FFmpeg error: {result.stderr}"
-        elif result.returncode == 4294967274:  # Common Windows error code
+                error_msg = f"FFmpeg error: {stderr}"
+        elif returncode == 4294967274:  # Common Windows error code
             error_msg = "FFmpeg process was terminated - this may be due to encoding issues or wrong activation bytes"
-        
+
         raise Exception(error_msg)
+
+    app.logger.info(f"FFmpeg conversion to {output_format.upper()} successful.")
+    return temp_output
+
 def _convert_with_fallback_method(input_file, output_dir, activation_bytes=None, output_format='mp3'):
     """Fallback conversion method for older .aax files with problematic AAC streams"""
     app.logger.info("Starting fallback conversion method...")
     
     # Check if FFmpeg is available
-    ffmpeg_available, error_msg = check_ffmpeg_availability()
-    if not ffmpeg_available:
-        raise Exception(f"FFmpeg is required but not available: {error_msg}")
+    if not FFMPEG_OK:
+        raise Exception(f"FFmpeg is required but not available: {FFMPEG_ERROR}")
     
     base_name = os.path.splitext(os.path.basename(input_file))[0]
-    temp_output = os.path.join(output_dir, f"{base_name}_fallback.{output_format}")
-    
+
     # Get the correct FFmpeg command
     ffmpeg_cmd, _ = get_ffmpeg_commands()
-    
+
     # Try multiple fallback strategies
     fallback_strategies = [
         # Strategy 1: Maximum error tolerance with different decoder
@@ -258,120 +515,354 @@ def _convert_with_fallback_method(input_file, output_dir, activation_bytes=None,
         }
     ]
     
-    for strategy in fallback_strategies:
-        app.logger.info(f"Trying fallback strategy: {strategy['name']}")
-        
+    # The strategies are independent and write distinct temp files, so
+    # race them and take the first one to finish cleanly instead of
+    # eating up to four 900 s timeouts back to back. Sharing one decoded
+    # PCM stream across the retries was considered and rejected: the
+    # strategies differ precisely in their decode flags, so each needs
+    # its own decrypt+decode of the source
+    running = {}
+
+    def run_strategy(index, strategy):
+        temp_output = os.path.join(output_dir, f"{base_name}_fallback_{index}.{output_format}")
+
         # Build ffmpeg command
-        cmd = [ffmpeg_cmd]
+        cmd = [ffmpeg_cmd, '-nostats', '-loglevel', 'error']
         if activation_bytes and input_file.lower().endswith('.aax'):
             cmd.extend(['-activation_bytes', activation_bytes])
-        
+
         cmd.extend(['-i', input_file])
         cmd.extend(strategy['extra_flags'])
-        
+        # Strategy 3 pins -threads 1 on purpose; don't override it
+        if '-threads' not in strategy['extra_flags']:
+            cmd.extend(_FFMPEG_THREAD_FLAGS)
+
         # Set output codec if not copying or using raw format
         if 'copy' not in strategy['extra_flags'] and '-f' not in strategy['extra_flags']:
             if output_format.lower() == 'mp3':
                 cmd.extend(['-c:a', 'libmp3lame', '-b:a', '128k'])
             elif output_format.lower() == 'm4b':
                 cmd.extend(['-c:a', 'aac', '-b:a', '128k'])
-        
+
         cmd.extend([temp_output, '-y'])
-        
+
         app.logger.info(f"Running fallback FFmpeg command: {' '.join(cmd)}")
-        
+
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                stdin=subprocess.DEVNULL)
+        running[index] = proc
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False,
-                                  stdin=subprocess.DEVNULL, timeout=900,
-                                  encoding='utf-8', errors='replace')
-            
-            if result.returncode == 0:
-                app.logger.info(f"Fallback strategy '{strategy['name']}' succeeded!")
-                return temp_output
-            else:
-                app.logger.warning(f"Fallback strategy '{strategy['name']}' failed with return code {result.returncode}")
-                app.logger.warning(f"Stderr: {result.stderr[:500]}...")  # Truncate long error messages
-                
+            _, stderr = proc.communicate(timeout=900)
         except subprocess.TimeoutExpired:
-            app.logger.error(f"Fallback strategy '{strategy['name']}' timed out")
-        except Exception as e:
-            app.logger.error(f"Fallback strategy '{strategy['name']}' failed with exception: {str(e)}")
-    
+            proc.kill()
+            proc.communicate()
+            raise Exception(f"Fallback strategy '{strategy['name']}' timed out")
+
+        if proc.returncode != 0:
+            # Truncate long error messages, decode only what we report
+            raise Exception(f"Fallback strategy '{strategy['name']}' failed with return code "
+                            f"{proc.returncode}: {stderr[:500].decode('utf-8', 'replace')}")
+
+        return temp_output
+
+    # Cap concurrent ffmpeg runs to half the cores to avoid
+    # oversubscription - each process is internally threaded already
+    max_workers = min(len(fallback_strategies), max(1, (os.cpu_count() or 2) // 2))
+    errors = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_strategy, i, strategy): strategy
+                   for i, strategy in enumerate(fallback_strategies, 1)}
+
+        for future in concurrent.futures.as_completed(futures):
+            strategy = futures[future]
+            try:
+                temp_output = future.result()
+            except Exception as e:
+                app.logger.warning(str(e))
+                errors.append(str(e))
+                continue
+
+            app.logger.info(f"Fallback strategy '{strategy['name']}' succeeded!")
+            # First clean success wins - stop everything still in flight
+            for other in futures:
+                other.cancel()
+            for proc in running.values():
+                if proc.poll() is None:
+                    proc.terminate()
+            return temp_output
+
     # If all strategies failed
     raise Exception("All fallback conversion strategies failed. This .aax file may use an incompatible DRM scheme or have severe corruption.")
 
-def get_audio_duration(input_file):
-    """Get audio duration in seconds using FFmpeg"""
+def probe_media(input_file):
+    """Probe duration, bit rate and size with one ffprobe JSON call"""
     try:
         _, ffprobe_cmd = get_ffmpeg_commands()
-        cmd = [ffprobe_cmd, '-v', 'quiet', '-show_entries', 'format=duration', '-of', 'csv=p=0', input_file]
+        cmd = [ffprobe_cmd, '-v', 'quiet', '-print_format', 'json', '-show_format', input_file]
         result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return float(result.stdout.strip())
+        return json.loads(result.stdout).get('format', {})
     except Exception as e:
-        raise Exception(f"Failed to get audio duration: {str(e)}")
+        raise Exception(f"Failed to probe media file: {str(e)}")
+
+def get_audio_duration(input_file):
+    """Get audio duration in seconds, avoiding an ffprobe fork for MP3s"""
+    if MUTAGEN_AVAILABLE and input_file.lower().endswith('.mp3'):
+        audio = File(input_file)
+        if audio is not None and audio.info.length:
+            return audio.info.length
+    return float(probe_media(input_file)['duration'])
 
 def split_audio_file(input_file, output_dir, max_size_mb=24):
     """Split audio file into chunks of specified size using FFmpeg"""
     try:
-        # Get audio duration
-        total_duration_seconds = get_audio_duration(input_file)
-        
-        # Calculate duration per chunk based on file size
-        file_size_mb = get_file_size_mb(input_file)
-        
-        # Calculate chunk duration to achieve target file size
-        chunk_duration_seconds = (max_size_mb / file_size_mb) * total_duration_seconds
-        
+        # MP3 headers already carry duration and bit rate - reading them
+        # with mutagen takes ~1 ms vs a ~150 ms ffprobe fork
+        total_duration_seconds = bit_rate = None
+        if MUTAGEN_AVAILABLE and input_file.lower().endswith('.mp3'):
+            audio = File(input_file)
+            if audio is not None and audio.info.length:
+                total_duration_seconds = audio.info.length
+                bit_rate = float(getattr(audio.info, 'bitrate', 0) or 0)
+
+        if total_duration_seconds is None:
+            # One probe gives duration and bit rate together
+            fmt = probe_media(input_file)
+            total_duration_seconds = float(fmt['duration'])
+            bit_rate = float(fmt.get('bit_rate') or 0)
+        if bit_rate > 0:
+            # Exact: how long a chunk runs before it reaches max_size_mb
+            chunk_duration_seconds = (max_size_mb * 1024 * 1024 * 8) / bit_rate
+        else:
+            # Fallback heuristic when the container doesn't report a bit rate
+            file_size_mb = get_file_size_mb(input_file)
+            chunk_duration_seconds = (max_size_mb / file_size_mb) * total_duration_seconds
+
         # Ensure minimum chunk duration (1 minute)
         min_chunk_duration_seconds = 60
         chunk_duration_seconds = max(chunk_duration_seconds, min_chunk_duration_seconds)
-        
-        chunks = []
+
         base_name = os.path.splitext(os.path.basename(input_file))[0]
-        
-        # Split audio into chunks using FFmpeg
-        chunk_index = 1
-        start_time = 0
-        
-        while start_time < total_duration_seconds:
-            end_time = min(start_time + chunk_duration_seconds, total_duration_seconds)
-            duration = end_time - start_time
-            
-            chunk_filename = f"{base_name}_chunk_{chunk_index:03d}.mp3"
-            chunk_path = os.path.join(output_dir, chunk_filename)
-            
-            # Use FFmpeg to extract chunk
-            ffmpeg_cmd, _ = get_ffmpeg_commands()
-            cmd = [
-                ffmpeg_cmd, '-i', input_file,
-                '-ss', str(start_time),
-                '-t', str(duration),
-                '-acodec', 'libmp3lame',
-                '-ab', '128k',
-                chunk_path, '-y'
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                raise Exception(f"FFmpeg chunk creation error: {result.stderr}")
-            
-            chunks.append(chunk_path)
-            start_time = end_time
-            chunk_index += 1
-        
-        return chunks
+        ffmpeg_cmd, _ = get_ffmpeg_commands()
+
+        # Stream copy only works when the source is already MP3 - AAC
+        # packets can't live in an mp3 container, so chunking an M4B
+        # re-encodes at the app's usual 128k instead.
+        if input_file.lower().endswith('.mp3'):
+            codec_args = ['-c', 'copy']
+        else:
+            codec_args = ['-c:a', 'libmp3lame', '-b:a', '128k']
+
+        # Single pass: the segment muxer cuts the whole file in one ffmpeg
+        # invocation instead of one process (and one seek) per chunk
+        output_pattern = os.path.join(output_dir, f"{base_name}_chunk_%03d.mp3")
+        cmd = [
+            ffmpeg_cmd, '-nostats', '-loglevel', 'error',
+            '-i', input_file,
+            *codec_args,
+            '-map', '0:a',
+            '-f', 'segment',
+            '-segment_time', str(chunk_duration_seconds),
+            '-segment_format', 'mp3',
+            '-reset_timestamps', '1',
+            output_pattern, '-y'
+        ]
+
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode == 0:
+            chunks = sorted(glob.glob(os.path.join(output_dir, f"{base_name}_chunk_*.mp3")))
+            if chunks:
+                return chunks
+
+        app.logger.warning(f"Segment muxer split failed, falling back to per-chunk extraction: "
+                           f"{result.stderr[:500].decode('utf-8', 'replace')}")
+        return _split_with_chunk_seeks(input_file, output_dir, base_name,
+                                       total_duration_seconds, chunk_duration_seconds,
+                                       codec_args)
     except Exception as e:
         raise Exception(f"Audio splitting failed: {str(e)}")
 
+def _split_with_chunk_seeks(input_file, output_dir, base_name,
+                            total_duration_seconds, chunk_duration_seconds,
+                            codec_args):
+    """Fallback splitter: seek out each chunk with its own ffmpeg process"""
+    # Precompute every chunk's (start, duration, path) so extraction can
+    # run in parallel instead of one ffmpeg process at a time
+    chunk_specs = []
+    chunk_index = 1
+    start_time = 0
+
+    while start_time < total_duration_seconds:
+        end_time = min(start_time + chunk_duration_seconds, total_duration_seconds)
+        duration = end_time - start_time
+
+        chunk_filename = f"{base_name}_chunk_{chunk_index:03d}.mp3"
+        chunk_specs.append((start_time, duration, os.path.join(output_dir, chunk_filename)))
+
+        start_time = end_time
+        chunk_index += 1
+
+    ffmpeg_cmd, _ = get_ffmpeg_commands()
+
+    # First try one process with many outputs: ffmpeg reads the input a
+    # single time and routes packets into each output's -ss/-t window, so
+    # N chunks cost one spawn instead of N (~50-100 ms saved per chunk)
+    cmd = [ffmpeg_cmd, '-nostats', '-loglevel', 'error', '-i', input_file]
+    for chunk_start, duration, chunk_path in chunk_specs:
+        cmd.extend(['-ss', str(chunk_start), '-t', str(duration),
+                    *codec_args, '-map', '0:a', chunk_path])
+    cmd.append('-y')
+
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode == 0:
+        return [spec[2] for spec in chunk_specs]
+
+    app.logger.warning(f"Multi-output split failed, extracting chunks individually: "
+                       f"{result.stderr[:500].decode('utf-8', 'replace')}")
+
+    def extract_chunk(spec):
+        chunk_start, duration, chunk_path = spec
+        # -ss before -i makes ffmpeg seek via the container index (the
+        # Xing TOC for MP3) rather than decoding everything up to the
+        # seek point - output-side -ss would make chunk k cost O(k) and
+        # the whole split O(N^2). codec_args is stream copy for MP3
+        # sources (no pointless re-encode or double-encoding loss) and
+        # a 128k libmp3lame encode for everything else.
+        cmd = [
+            ffmpeg_cmd, '-nostats', '-loglevel', 'error',
+            '-ss', str(chunk_start),
+            '-t', str(duration),
+            '-i', input_file,
+            *codec_args,
+            '-map', '0:a',
+            chunk_path, '-y'
+        ]
+
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise Exception(f"FFmpeg chunk creation error: {result.stderr[-4096:].decode('utf-8', 'replace')}")
+
+        return chunk_path
+
+    # The work happens in ffmpeg subprocesses, so threads scale to core
+    # count without fighting the GIL
+    with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        chunks = list(executor.map(extract_chunk, chunk_specs))
+
+    return chunks
+
+def convert_and_split_audible_file(input_file, output_dir, activation_bytes=None, max_size_mb=24):
+    """Convert an Audible file straight into MP3 chunks in one pass.
+
+    The decoder's MP3 output is piped into a second ffmpeg running the
+    segment muxer, so the intermediate single-file MP3 never touches disk
+    - that saves a full write+read of the whole audiobook.
+    """
+    if not FFMPEG_OK:
+        raise Exception(f"FFmpeg is required but not available: {FFMPEG_ERROR}")
+
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    ffmpeg_cmd, _ = get_ffmpeg_commands()
+
+    # Output is always 128k MP3, so the chunk length that fills
+    # max_size_mb is known up front
+    chunk_duration_seconds = max((max_size_mb * 1024 * 1024 * 8) / 128000.0, 60)
+
+    # Stage 1: decrypt/decode to MP3 on stdout. Quiet logging is required
+    # here - unread stderr chatter would fill the pipe and stall the run
+    decode_cmd = [ffmpeg_cmd, '-nostats', '-loglevel', 'error']
+    if activation_bytes and input_file.lower().endswith('.aax'):
+        decode_cmd.extend(['-activation_bytes', activation_bytes])
+    decode_cmd.extend(['-err_detect', 'ignore_err', '-fflags', '+igndts+ignidx'])
+    decode_cmd.extend(['-i', input_file])
+    decode_cmd.extend(_FFMPEG_THREAD_FLAGS)
+    decode_cmd.extend(['-c:a', 'libmp3lame', '-b:a', '128k', '-f', 'mp3', 'pipe:1'])
+
+    # Stage 2: cut the MP3 stream into chunks without re-encoding
+    output_pattern = os.path.join(output_dir, f"{base_name}_chunk_%03d.mp3")
+    segment_cmd = [
+        ffmpeg_cmd, '-nostats', '-loglevel', 'error',
+        '-f', 'mp3', '-i', 'pipe:0',
+        '-c', 'copy',
+        '-map', '0:a',
+        '-f', 'segment',
+        '-segment_time', str(chunk_duration_seconds),
+        '-reset_timestamps', '1',
+        output_pattern, '-y'
+    ]
+
+    app.logger.info(f"Running piped conversion pipeline: {' '.join(decode_cmd)} | {' '.join(segment_cmd)}")
+
+    decoder = subprocess.Popen(decode_cmd, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    segmenter = subprocess.Popen(segment_cmd, stdin=decoder.stdout,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # Drop the parent's handle so the segmenter sees EOF when the decoder exits
+    decoder.stdout.close()
+
+    _, segment_stderr = segmenter.communicate(timeout=900)
+    _, decode_stderr = decoder.communicate(timeout=60)
+
+    if decoder.returncode != 0 or segmenter.returncode != 0:
+        stderr = (decode_stderr or segment_stderr or b'')[-4096:].decode('utf-8', 'replace')
+        raise Exception(f"FFmpeg pipeline failed: {stderr}")
+
+    chunks = sorted(glob.glob(os.path.join(output_dir, f"{base_name}_chunk_*.mp3")))
+    if not chunks:
+        raise Exception("FFmpeg pipeline produced no chunks")
+    return chunks
+
+def convert_stream_to_mp3(src_stream, final_path):
+    """Convert an upload stream to MP3 without writing the input to disk.
+
+    Only valid for inputs ffmpeg can read sequentially (.aa): the AAX
+    path needs a seekable file because its MOV atoms sit at the end.
+    MP3 output is itself streamable, so ffmpeg's stdout goes straight
+    into the destination file.
+    """
+    if not FFMPEG_OK:
+        raise Exception(f"FFmpeg is required but not available: {FFMPEG_ERROR}")
+
+    ffmpeg_cmd, _ = get_ffmpeg_commands()
+    cmd = [ffmpeg_cmd, '-nostats', '-loglevel', 'error', '-i', 'pipe:0']
+    cmd.extend(_FFMPEG_THREAD_FLAGS)
+    cmd.extend(['-c:a', 'libmp3lame', '-b:a', '128k', '-f', 'mp3', 'pipe:1'])
+
+    app.logger.info(f"Running streaming FFmpeg command: {' '.join(cmd)}")
+
+    with open(final_path, 'wb') as out:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=out,
+                                stderr=subprocess.PIPE)
+        try:
+            shutil.copyfileobj(src_stream, proc.stdin, 1 << 20)
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass  # ffmpeg died early; the returncode check below reports it
+        _, stderr = proc.communicate(timeout=900)
+
+    if proc.returncode != 0:
+        try:
+            os.remove(final_path)  # don't leave a truncated output behind
+        except OSError:
+            pass
+        raise Exception(f"FFmpeg streaming conversion failed: {stderr[-4096:].decode('utf-8', 'replace')}")
+
 def create_zip_archive(file_paths, zip_name):
     """Create a ZIP archive containing all converted files"""
     zip_path = os.path.join(OUTPUT_FOLDER, zip_name)
-    
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+
+    # MP3 data is already entropy-coded, so DEFLATE burns CPU for no size
+    # win - store the chunks uncompressed. Copying through zipf.open with
+    # a 4 MB buffer replaces ZipFile.write's 8 KB read loop; the payload
+    # still has to pass through userspace because even STORED entries
+    # need a CRC-32 computed over every byte
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED) as zipf:
         for file_path in file_paths:
             if os.path.exists(file_path):
                 arcname = os.path.basename(file_path)
-                zipf.write(file_path, arcname)
+                zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                zinfo.compress_type = zipfile.ZIP_STORED
+                with open(file_path, 'rb') as src, zipf.open(zinfo, 'w') as dst:
+                    shutil.copyfileobj(src, dst, length=4 * 1024 * 1024)
     
     return zip_path
 
@@ -406,35 +897,212 @@ def upload_file():
             return jsonify({'error': 'Invalid file type. Only .aax and .aa files are allowed'}), 400
         
         filename = secure_filename(file.filename)
-        
-        # Create a unique temporary directory for this conversion
-        temp_dir = tempfile.mkdtemp(prefix="conversion_")
+
+        # .aa input needs no activation bytes and no seeking, so it can
+        # stream through ffmpeg straight into the output file without the
+        # upload or an intermediate ever touching disk
+        if (filename.lower().endswith('.aa')
+                and request.form.get('output_format', 'mp3').lower() == 'mp3'
+                and request.form.get('chunk') not in ('1', 'true', 'yes')
+                and request.form.get('background') not in ('1', 'true', 'yes')):
+            final_filename = f"{os.path.splitext(filename)[0]}.mp3"
+            final_path = os.path.join(OUTPUT_FOLDER, final_filename)
+            app.logger.info(f"Streaming {filename} through ffmpeg to {final_path}")
+            convert_stream_to_mp3(file.stream, final_path)
+            total_size_mb = get_file_size_mb(final_path)
+            return jsonify({
+                'success': True,
+                'message': 'File converted successfully',
+                'download_url': f'/download/{final_filename}',
+                'filename': final_filename,
+                'output_format': 'MP3',
+                'total_size_mb': round(total_size_mb, 2),
+                'can_chunk': total_size_mb > MAX_CHUNK_SIZE_MB
+            })
+
+        # Create a unique temporary directory for this conversion. It
+        # lives inside OUTPUT_FOLDER so moving the finished file out of it
+        # is a single rename(2) - mkdtemp's default /tmp is often another
+        # filesystem, which would force a full byte copy
+        temp_dir = tempfile.mkdtemp(prefix="conversion_", dir=OUTPUT_FOLDER)
         app.logger.info(f"Created temporary directory: {temp_dir}")
 
-        # Save uploaded file to the temporary directory
+        # Save uploaded file to the temporary directory, kernel-side via
+        # sendfile when the spool is already on disk
         upload_path = os.path.join(temp_dir, filename)
-        file.save(upload_path)
+        with open(upload_path, 'wb') as f:
+            # Reserve the extent up front where the platform supports it -
+            # one contiguous allocation instead of many incremental extent
+            # grows, which also speeds up the sequential re-read by ffmpeg.
+            # Content-Length includes multipart framing, so it slightly
+            # overshoots; _copy_upload_stream truncates to the real size
+            if hasattr(os, 'posix_fallocate') and request.content_length:
+                try:
+                    os.posix_fallocate(f.fileno(), 0, request.content_length)
+                except OSError:
+                    pass  # e.g. unsupported filesystem - plain writes still work
+            _copy_upload_stream(file.stream, f)
         app.logger.info(f"Saved uploaded file to: {upload_path}")
         
         # Get output format from form
         output_format = request.form.get('output_format', 'mp3').lower()
         if output_format not in ['mp3', 'm4b']:
             output_format = 'mp3'  # Default fallback
-        
+
+        # Direct-to-chunks mode: pipe the decode into the segment muxer so
+        # the single intermediate MP3 never hits disk
+        if output_format == 'mp3' and request.form.get('chunk') in ('1', 'true', 'yes'):
+            app.logger.info(f"Converting {filename} straight to MP3 chunks...")
+            chunk_files = convert_and_split_audible_file(upload_path, temp_dir,
+                                                         activation_bytes, MAX_CHUNK_SIZE_MB)
+            zip_name = f"{os.path.splitext(filename)[0]}_chunked.zip"
+            zip_path = create_zip_archive(chunk_files, zip_name)
+            total_size_mb = get_file_size_mb(zip_path)
+            return jsonify({
+                'success': True,
+                'message': f'File converted into {len(chunk_files)} chunks successfully',
+                'download_url': f'/download/{zip_name}',
+                'zip_name': zip_name,
+                'total_chunks': len(chunk_files),
+                'total_size_mb': round(total_size_mb, 2)
+            })
+
+        # Streaming mode: emit SSE progress events for the whole run so
+        # clients can render a bar and proxies see steady traffic instead
+        # of one response after many silent minutes
+        if request.form.get('progress') in ('1', 'true', 'yes'):
+            generator = _stream_conversion_progress(temp_dir, upload_path, filename,
+                                                    activation_bytes, output_format)
+            temp_dir = None  # The generator owns the temp directory now
+            return Response(stream_with_context(generator), mimetype='text/event-stream')
+
+        # Re-uploads of the same book are common - fingerprint the upload
+        # and hand back the existing output instead of converting again
+        digest = _upload_digest(upload_path)
+        cached_filename = _find_cached_output(digest, output_format)
+        if cached_filename:
+            app.logger.info(f"Duplicate upload detected, reusing {cached_filename}")
+            total_size_mb = get_file_size_mb(os.path.join(OUTPUT_FOLDER, cached_filename))
+            return jsonify({
+                'success': True,
+                'message': 'File was already converted',
+                'download_url': f'/download/{cached_filename}',
+                'filename': cached_filename,
+                'output_format': output_format.upper(),
+                'total_size_mb': round(total_size_mb, 2),
+                'can_chunk': total_size_mb > MAX_CHUNK_SIZE_MB
+            })
+
+        # Optional background mode: queue the conversion and answer with a
+        # job id instead of holding the connection open for the whole run
+        if request.form.get('background') in ('1', 'true', 'yes'):
+            job_id = uuid.uuid4().hex
+            future = _CONVERSION_EXECUTOR.submit(
+                _run_conversion_job, temp_dir, upload_path, filename,
+                activation_bytes, output_format, digest)
+            with _CONVERSION_JOBS_LOCK:
+                _CONVERSION_JOBS[job_id] = future
+            temp_dir = None  # The job owns the temp directory now
+            app.logger.info(f"Queued background conversion job {job_id} for {filename}")
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status_url': f'/job/{job_id}',
+                'message': 'Conversion started in background'
+            }), 202
+
+        response_data = _run_conversion_job(temp_dir, upload_path, filename,
+                                            activation_bytes, output_format, digest)
+        temp_dir = None  # Already cleaned up by the job
+        return jsonify(response_data)
+
+    except Exception as e:
+        app.logger.error(f"An error occurred during upload/conversion: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+    finally:
+        # Cleanup happens off the request thread so the response isn't
+        # delayed by unlinking gigabytes of temp data
+        schedule_temp_cleanup(temp_dir)
+
+def _stream_conversion_progress(temp_dir, upload_path, filename, activation_bytes, output_format):
+    """Generator yielding SSE progress events for one conversion.
+
+    ffmpeg's -progress pipe:1 emits key=value lines about once a second;
+    out_time_us against the probed duration gives a percentage without
+    any polling endpoint, and the final event carries the download URL.
+    """
+    try:
+        try:
+            total_seconds = get_audio_duration(upload_path)
+        except Exception:
+            total_seconds = None
+
+        cmd, temp_output = _build_standard_cmd(upload_path, temp_dir,
+                                               activation_bytes, output_format)
+        # Progress key=value lines go to stdout, one block per second
+        cmd[1:1] = ['-progress', 'pipe:1']
+
+        app.logger.info(f"Running FFmpeg command with progress: {' '.join(cmd)}")
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        for line in proc.stdout:
+            if line.startswith(b'out_time_us=') and total_seconds:
+                try:
+                    done_seconds = int(line.split(b'=', 1)[1]) / 1_000_000
+                except ValueError:
+                    continue
+                pct = min(99, round(done_seconds / total_seconds * 100))
+                yield f"data: {json.dumps({'status': 'converting', 'pct': pct})}\n\n"
+            elif line.startswith(b'progress=end'):
+                break
+
+        _, stderr = proc.communicate(timeout=900)
+        if proc.returncode != 0:
+            error = stderr[-4096:].decode('utf-8', 'replace')
+            app.logger.error(f"Streaming conversion failed: {error}")
+            yield f"data: {json.dumps({'status': 'error', 'error': error})}\n\n"
+            return
+
+        final_filename = f"{os.path.splitext(filename)[0]}.{output_format}"
+        final_path = os.path.join(OUTPUT_FOLDER, final_filename)
+        os.replace(temp_output, final_path)
+        total_size_mb = get_file_size_mb(final_path)
+
+        yield "data: " + json.dumps({
+            'status': 'finished',
+            'pct': 100,
+            'download_url': f'/download/{final_filename}',
+            'filename': final_filename,
+            'output_format': output_format.upper(),
+            'total_size_mb': round(total_size_mb, 2),
+            'can_chunk': total_size_mb > MAX_CHUNK_SIZE_MB
+        }) + "\n\n"
+    finally:
+        schedule_temp_cleanup(temp_dir)
+
+def _run_conversion_job(temp_dir, upload_path, filename, activation_bytes,
+                        output_format, digest=None):
+    """Convert one uploaded file and move the result into OUTPUT_FOLDER"""
+    try:
         # Convert Audible file to specified format (no chunking at this stage)
         app.logger.info(f"Converting {filename} to {output_format.upper()}...")
         temp_output = convert_audible_file(upload_path, temp_dir, activation_bytes, output_format)
-        
+
         # Always create a single output file first
         final_filename = f"{os.path.splitext(filename)[0]}.{output_format}"
         final_path = os.path.join(OUTPUT_FOLDER, final_filename)
-        
-        # Move the converted file to the final output directory
-        shutil.move(temp_output, final_path)
+
+        # Move the converted file to the final output directory - same
+        # filesystem, so this is an atomic O(1) rename
+        os.replace(temp_output, final_path)
         app.logger.info(f"Moved final MP3 to: {final_path}")
-        
+
         total_size_mb = get_file_size_mb(final_path)
 
+        if digest:
+            _record_cached_output(digest, output_format, final_filename)
+
         response_data = {
             'success': True,
             'message': 'File converted successfully',
@@ -446,41 +1114,57 @@ def upload_file():
         }
 
         app.logger.info("Conversion process successful.")
-        return jsonify(response_data)
-        
-    except Exception as e:
-        app.logger.error(f"An error occurred during upload/conversion: {str(e)}", exc_info=True)
-        return jsonify({'error': str(e)}), 500
+        return response_data
     finally:
         # Cleanup: remove the temporary directory and its contents
-        if temp_dir and os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir)
-                app.logger.info(f"Successfully cleaned up temporary directory: {temp_dir}")
-            except Exception as e:
-                app.logger.error(f"Failed to clean up temporary directory {temp_dir}: {e}")
+        schedule_temp_cleanup(temp_dir)
+
+@app.route('/job/<job_id>')
+def job_status(job_id):
+    """Poll the state of a background conversion job"""
+    with _CONVERSION_JOBS_LOCK:
+        future = _CONVERSION_JOBS.get(job_id)
+
+    if future is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    if not future.done():
+        return jsonify({'job_id': job_id, 'status': 'running'})
+
+    # Finished jobs can be dropped from the registry once reported
+    with _CONVERSION_JOBS_LOCK:
+        _CONVERSION_JOBS.pop(job_id, None)
+
+    error = future.exception()
+    if error is not None:
+        app.logger.error(f"Background job {job_id} failed: {error}")
+        return jsonify({'job_id': job_id, 'status': 'error', 'error': str(error)}), 500
+
+    return jsonify({'job_id': job_id, 'status': 'finished', 'result': future.result()})
 
 @app.route('/download/<filename>')
 def download_file(filename):
     try:
-        file_path = os.path.join(OUTPUT_FOLDER, filename)
-        if os.path.exists(file_path):
-            return send_file(file_path, as_attachment=True)
-        else:
-            return jsonify({'error': 'File not found'}), 404
+        # conditional=True enables Range requests and 304 responses, so
+        # interrupted downloads resume instead of restarting.
+        # send_from_directory stats the file itself, so no extra
+        # existence check up front - it raises NotFound when missing
+        return send_from_directory(OUTPUT_FOLDER, filename,
+                                   as_attachment=True, conditional=True)
+    except NotFound:
+        return jsonify({'error': 'File not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/status')
 def status():
-    ffmpeg_available, ffmpeg_error = check_ffmpeg_availability()
     return jsonify({
         'status': 'running',
         'upload_folder': UPLOAD_FOLDER,
         'output_folder': OUTPUT_FOLDER,
         'max_chunk_size_mb': MAX_CHUNK_SIZE_MB,
-        'ffmpeg_available': ffmpeg_available,
-        'ffmpeg_error': ffmpeg_error if not ffmpeg_available else None
+        'ffmpeg_available': FFMPEG_OK,
+        'ffmpeg_error': FFMPEG_ERROR if not FFMPEG_OK else None
     })
 
 @app.route('/extract-activation-bytes', methods=['POST'])
@@ -507,7 +1191,7 @@ def extract_activation_bytes():
         elif method == 'manual':
             # For manual input
             activation_bytes = data.get('activation_bytes')
-            if activation_bytes and len(activation_bytes) == 8:
+            if activation_bytes and ACTIVATION_BYTES_RE.match(activation_bytes):
                 # Test the provided activation bytes
                 if extractor.test_activation_bytes(activation_bytes):
                     result = activation_bytes.upper()
@@ -551,10 +1235,10 @@ def test_activation_bytes_endpoint():
         
         if not activation_bytes:
             return jsonify({'error': 'activation_bytes required'}), 400
-        
-        if len(activation_bytes) != 8:
-            return jsonify({'error': 'Activation bytes must be 8 characters long'}), 400
-        
+
+        if not ACTIVATION_BYTES_RE.match(activation_bytes):
+            return jsonify({'error': 'Activation bytes must be 8 hexadecimal characters'}), 400
+
         extractor = ActivationBytesExtractor()
         success = extractor.test_activation_bytes(activation_bytes)
         
@@ -598,7 +1282,8 @@ def chunk_file():
             app.logger.info(f"Created ZIP archive: {zip_path}")
             
             total_chunks = len(chunk_files)
-            total_size_mb = sum(get_file_size_mb(chunk) for chunk in chunk_files)
+            # One os.stat per chunk, straight off the write path
+            total_size_mb = sum(os.stat(chunk).st_size for chunk in chunk_files) / (1024 * 1024)
             
             return jsonify({
                 'success': True,
@@ -610,10 +1295,8 @@ def chunk_file():
             })
             
         finally:
-            # Clean up temporary directory
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-                app.logger.info(f"Cleaned up chunking temp directory: {temp_dir}")
+            # Clean up temporary directory off the request thread
+            schedule_temp_cleanup(temp_dir)
         
     except Exception as e:
         app.logger.error(f"Chunking failed: {str(e)}", exc_info=True)
@@ -628,107 +1311,29 @@ def save_activation_bytes_endpoint():
         
         if not activation_bytes:
             return jsonify({'error': 'activation_bytes required'}), 400
-        
-        if len(activation_bytes) != 8:
-            return jsonify({'error': 'Activation bytes must be 8 characters long'}), 400
-        
-        # Save to file
-        with open('activation_bytes.txt', 'w') as f:
-            f.write(activation_bytes.upper())
-        
+
+        if not ACTIVATION_BYTES_RE.match(activation_bytes):
+            return jsonify({'error': 'Activation bytes must be 8 hexadecimal characters'}), 400
+
+        # Save to file and update the in-memory cache
+        store_activation_bytes(activation_bytes.upper())
+
         return jsonify({
             'success': True,
             'message': f'Activation bytes saved: {activation_bytes.upper()}',
-            'file': 'activation_bytes.txt'
+            'file': ACTIVATION_BYTES_FILE
         })
         
     except Exception as e:
         return jsonify({'error': f'Save failed: {str(e)}'}), 500
 
-@app.route('/extract-activation-bytes', methods=['POST'])
-def extract_activation_bytes_endpoint():
-    """Extract activation bytes using audible-cli"""
-    try:
-        data = request.get_json()
-        method = data.get('method', 'cli')
-        
-        if method != 'cli':
-            return jsonify({
-                'success': False,
-                'error': 'Only audible-cli method is supported'
-            }), 400
-        
-        app.logger.info("Attempting to extract activation bytes using audible-cli...")
-        
-        # Try to use audible-cli to get activation bytes
-        try:
-            # Check if audible-cli is available
-            result = subprocess.run(['py', '-m', 'audible_cli', '--version'], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode != 0:
-                return jsonify({
-                    'success': False,
-                    'error': 'audible-cli not found. Please install it with: pip install audible-cli'
-                }), 400
-            
-            # Try to get activation bytes
-            result = subprocess.run(['py', '-m', 'audible_cli', 'activation-bytes'], 
-                                  capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                output = result.stdout.strip()
-                # Extract 8-character hex string from output
-                import re
-                hex_match = re.search(r'\b([0-9A-Fa-f]{8})\b', output)
-                if hex_match:
-                    activation_bytes = hex_match.group(1).upper()
-                    
-                    # Save to file for future use
-                    with open('activation_bytes.txt', 'w') as f:
-                        f.write(activation_bytes)
-                    
-                    app.logger.info(f"Successfully extracted activation bytes: {activation_bytes}")
-                    return jsonify({
-                        'success': True,
-                        'activation_bytes': activation_bytes,
-                        'message': 'Activation bytes extracted successfully'
-                    })
-                else:
-                    return jsonify({
-                        'success': False,
-                        'error': 'Could not find activation bytes in audible-cli output'
-                    }), 400
-            else:
-                error_msg = result.stderr.strip() if result.stderr else 'Unknown error'
-                return jsonify({
-                    'success': False,
-                    'error': f'audible-cli failed: {error_msg}'
-                }), 400
-                
-        except subprocess.TimeoutExpired:
-            return jsonify({
-                'success': False,
-                'error': 'audible-cli command timed out'
-            }), 400
-        except Exception as e:
-            return jsonify({
-                'success': False,
-                'error': f'Error running audible-cli: {str(e)}'
-            }), 500
-            
-    except Exception as e:
-        app.logger.error(f"Activation bytes extraction failed: {str(e)}", exc_info=True)
-        return jsonify({'error': f'Extraction failed: {str(e)}'}), 500
-
 @app.route('/load-activation-bytes', methods=['GET'])
 def load_activation_bytes_endpoint():
     """Load saved activation bytes from file"""
     try:
-        if os.path.exists('activation_bytes.txt'):
-            with open('activation_bytes.txt', 'r') as f:
-                activation_bytes = f.read().strip()
-            
-            if len(activation_bytes) == 8:
+        activation_bytes = load_saved_activation_bytes()
+        if activation_bytes:
+            if ACTIVATION_BYTES_RE.match(activation_bytes):
                 return jsonify({
                     'success': True,
                     'activation_bytes': activation_bytes,
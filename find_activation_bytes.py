@@ -4,8 +4,87 @@ Simple script to search for existing activation bytes in common locations.
 """
 
 import os
-import re
+import glob
+import json
+import subprocess
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from scan_utils import iter_candidate_files, extract_hex_candidates
+
+# File extensions worth scanning for activation bytes text; .aax files
+# are collected in the same pass as probe targets for testing.
+TEXT_EXTENSIONS = ('.json', '.txt', '.log', '.cfg', '.ini', '.xml', '.plist')
+SCAN_EXTENSIONS = TEXT_EXTENSIONS + ('.aax',)
+
+# Hard cap per search root: every candidate costs a full ffprobe decode
+# attempt later, so an unbounded list of hex-looking noise is worse than
+# a truncated one.
+MAX_CANDIDATES = 32
+
+# Scan results are cached here keyed on each root's top-level mtime, so
+# running this script and get_activation_bytes.py back to back only pays
+# for the directory walk once.
+SCAN_CACHE_FILE = Path.home() / ".cache" / "audible-dl" / "scan.json"
+
+def load_scan_cache(roots):
+    """Return cached (candidates, aax_files) if every root is unchanged
+    since the last scan, else None."""
+    try:
+        with open(SCAN_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        cached_roots = cache['roots']
+        for root in roots:
+            if cached_roots.get(str(root)) != os.stat(root).st_mtime_ns:
+                return None
+        return cache['candidates'], cache.get('aax', [])
+    except Exception:
+        return None
+
+def save_scan_cache(roots, candidates, aax_files):
+    """Persist scan results keyed on each root's top-level mtime."""
+    try:
+        SCAN_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(SCAN_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'roots': {str(root): os.stat(root).st_mtime_ns for root in roots},
+                'candidates': candidates,
+                'aax': aax_files,
+            }, f)
+    except Exception:
+        pass
+
+def _scan_location(location):
+    """Scan one search root; returns (found_bytes, aax_candidates) for it."""
+    found_bytes = []
+    aax_candidates = []
+
+    # Console writes are synchronous and slow (milliseconds per line on
+    # Windows), so messages are buffered and emitted once per location -
+    # which also keeps output from the scan threads from interleaving.
+    messages = [f"\nSearching in: {location}"]
+
+    try:
+        # Search files in this location; the same pass collects .aax
+        # probe targets alongside text candidates.
+        for entry in iter_candidate_files([location], SCAN_EXTENSIONS):
+            if entry.name.lower().endswith('.aax'):
+                aax_candidates.append(entry.path)
+                continue
+
+            for match in extract_hex_candidates(entry):
+                if match not in found_bytes:
+                    found_bytes.append(match)
+                    messages.append(f"  ✓ Found potential activation bytes: {match} in {entry.name}")
+
+            if len(found_bytes) >= MAX_CANDIDATES:
+                break
+
+    except Exception as e:
+        messages.append(f"  Error searching {location}: {e}")
+
+    print('\n'.join(messages))
+    return found_bytes, aax_candidates
 
 def search_for_activation_bytes():
     """Search for activation bytes in common file locations"""
@@ -13,93 +92,59 @@ def search_for_activation_bytes():
     print("Searching for activation bytes in common locations...")
     print("=" * 50)
     
-    # Common search locations
+    # Common search locations; Music is included so the same pass also
+    # turns up .aax files to test candidates against.
     search_locations = [
         Path.home() / "AppData" / "Roaming" / "Audible",
-        Path.home() / "AppData" / "Local" / "Audible", 
+        Path.home() / "AppData" / "Local" / "Audible",
         Path.home() / "AppData" / "Roaming" / "AudibleDownloadManager",
         Path.home() / "Documents",
         Path.home() / "Downloads",
+        Path.home() / "Music",
         Path(".")  # Current directory
     ]
-    
-    # File extensions to search
-    file_extensions = ['.json', '.txt', '.log', '.cfg', '.ini', '.xml', '.plist']
-    
+
     found_bytes = []
-    
-    for location in search_locations:
+    aax_candidates = []
+
+    existing = [location for location in search_locations if location.exists()]
+
+    cached = load_scan_cache(existing)
+    if cached is not None:
+        print("Using cached scan results (no search location has changed).")
+        return cached
+
+    # The walk is latency-bound on directory metadata, so scan each root
+    # on its own thread and merge (with dedup) as results come back.
+    if existing:
+        with ThreadPoolExecutor(max_workers=len(existing)) as executor:
+            for location_bytes, location_aax in executor.map(_scan_location, existing):
+                for match in location_bytes:
+                    if match not in found_bytes and len(found_bytes) < MAX_CANDIDATES:
+                        found_bytes.append(match)
+                aax_candidates.extend(location_aax)
+
+    save_scan_cache(existing, found_bytes, aax_candidates)
+    return found_bytes, aax_candidates
+
+def _first_aax(locations):
+    """Return the first .aax file found under locations, or None.
+
+    glob.iglob streams results, so the walk stops at the first hit
+    instead of materializing every match the way Path.rglob would.
+    """
+    for location in locations:
         if not location.exists():
             continue
-            
-        print(f"\nSearching in: {location}")
-        
-        try:
-            # Search files in this location
-            for file_path in location.rglob("*"):
-                if not file_path.is_file():
-                    continue
-                    
-                if file_path.suffix.lower() not in file_extensions:
-                    continue
-                
-                try:
-                    # Try to read file
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    # Look for activation bytes patterns
-                    patterns = [
-                        r'activation.?bytes["\s:=]+([0-9A-Fa-f]{8})',  # activation_bytes: "12345678"
-                        r'"activation.?bytes"["\s:=]+([0-9A-Fa-f]{8})',  # "activation_bytes": "12345678"
-                        r'["\s]([0-9A-Fa-f]{8})["\s]',  # Any 8-char hex string
-                        r'bytes["\s:=]+([0-9A-Fa-f]{8})',  # bytes: "12345678"
-                    ]
-                    
-                    for pattern in patterns:
-                        matches = re.findall(pattern, content, re.IGNORECASE)
-                        for match in matches:
-                            if len(match) == 8 and match not in found_bytes:
-                                found_bytes.append(match.upper())
-                                print(f"  ✓ Found potential activation bytes: {match.upper()} in {file_path.name}")
-                
-                except Exception as e:
-                    # Skip files that can't be read
-                    continue
-                    
-        except Exception as e:
-            print(f"  Error searching {location}: {e}")
-            continue
-    
-    return found_bytes
+        for path in glob.iglob(os.path.join(str(location), '**', '*.aax'), recursive=True):
+            return path
+    return None
 
-def test_activation_bytes(activation_bytes):
-    """Test if activation bytes work with a sample .aax file"""
-    print(f"\nTesting activation bytes: {activation_bytes}")
-    
-    # Look for .aax files in common locations
-    test_locations = [
-        Path.home() / "Documents",
-        Path.home() / "Downloads", 
-        Path.home() / "Music",
-        Path(".")
-    ]
-    
-    aax_files = []
-    for location in test_locations:
-        if location.exists():
-            aax_files.extend(list(location.rglob("*.aax")))
-    
-    if not aax_files:
-        print("  No .aax files found for testing")
-        return False
-    
-    test_file = aax_files[0]
-    print(f"  Testing with file: {test_file.name}")
+def test_activation_bytes(activation_bytes, test_file):
+    """Test if activation bytes can decrypt the given .aax file."""
+    print(f"\nTesting activation bytes: {activation_bytes} against {os.path.basename(test_file)}")
     
     try:
-        import subprocess
-        
         # Try to get file info using ffprobe with activation bytes
         cmd = [
             'ffprobe', 
@@ -127,8 +172,8 @@ def main():
     print("Activation Bytes Finder")
     print("=" * 30)
     
-    # Search for activation bytes
-    found_bytes = search_for_activation_bytes()
+    # Search for activation bytes (and .aax probe targets) in one pass
+    found_bytes, aax_candidates = search_for_activation_bytes()
     
     if found_bytes:
         print(f"\n🎉 Found {len(found_bytes)} potential activation bytes:")
@@ -138,19 +183,51 @@ def main():
         # Test each one
         print("\nTesting activation bytes...")
         working_bytes = []
-        
-        for bytes_val in found_bytes:
-            if test_activation_bytes(bytes_val):
-                working_bytes.append(bytes_val)
+
+        # The scan usually supplies a probe target; fall back to a
+        # streaming glob that stops at the first hit (covers .aax files
+        # deeper than the scan's depth cap).
+        test_file = aax_candidates[0] if aax_candidates else _first_aax([
+            Path.home() / "Documents",
+            Path.home() / "Downloads",
+            Path.home() / "Music",
+            Path(".")
+        ])
+
+        if test_file is None:
+            print("  No .aax files found for testing")
+        else:
+            # Each ffprobe runs on one core and spends its time in a
+            # subprocess wait, so candidates are raced in parallel and
+            # the remaining futures cancelled at the first working key.
+            with ThreadPoolExecutor(max_workers=min(8, len(found_bytes))) as executor:
+                futures = {executor.submit(test_activation_bytes, bytes_val, test_file): bytes_val
+                           for bytes_val in found_bytes}
+                for future in as_completed(futures):
+                    if future.result():
+                        working_bytes.append(futures[future])
+                        for other in futures:
+                            other.cancel()
+                        break
         
         if working_bytes:
             print(f"\n✅ Working activation bytes found:")
             for bytes_val in working_bytes:
                 print(f"  {bytes_val}")
                 
-                # Save to file
-                with open('activation_bytes.txt', 'w') as f:
-                    f.write(bytes_val)
+                # Save to file - compare first so a re-run with the
+                # same key doesn't rewrite, and rename a temp file into
+                # place so a crash can't leave a torn file.
+                try:
+                    with open('activation_bytes.txt', 'r') as f:
+                        current = f.read().strip()
+                except OSError:
+                    current = ''
+                if current != bytes_val:
+                    tmp_file = 'activation_bytes.txt.tmp'
+                    with open(tmp_file, 'w') as f:
+                        f.write(bytes_val)
+                    os.replace(tmp_file, 'activation_bytes.txt')
                 print(f"  Saved to: activation_bytes.txt")
                 break
         else:
@@ -7,8 +7,23 @@ This script provides multiple methods to obtain activation bytes.
 import os
 import sys
 import json
+import subprocess
 from pathlib import Path
 
+from find_activation_bytes import load_scan_cache
+from scan_utils import iter_candidate_files, extract_hex_candidates
+
+def _is_valid_activation_bytes(value):
+    """True for exactly 8 hex characters; bytes.fromhex validates the
+    whole string in one C call instead of a per-character membership loop."""
+    if len(value) != 8:
+        return False
+    try:
+        bytes.fromhex(value)
+        return True
+    except ValueError:
+        return False
+
 def method1_manual_input():
     """Method 1: Manual input of activation bytes"""
     print("\n=== METHOD 1: Manual Input ===")
@@ -18,7 +33,7 @@ def method1_manual_input():
     activation_bytes = input("Enter activation bytes (or press Enter to skip): ").strip()
     
     if activation_bytes:
-        if len(activation_bytes) == 8 and all(c in '0123456789ABCDEFabcdef' for c in activation_bytes):
+        if _is_valid_activation_bytes(activation_bytes):
             print(f"✓ Valid activation bytes: {activation_bytes.upper()}")
             return activation_bytes.upper()
         else:
@@ -51,7 +66,7 @@ def method2_browser_instructions():
     found = input("Did you find activation bytes using this method? (y/n): ").strip().lower()
     if found == 'y':
         activation_bytes = input("Enter the activation bytes you found: ").strip()
-        if activation_bytes and len(activation_bytes) == 8:
+        if _is_valid_activation_bytes(activation_bytes):
             return activation_bytes.upper()
     
     return None
@@ -92,9 +107,22 @@ def method3_audible_cli_setup():
         
         setup_done = input("Have you completed the audible-cli setup? (y/n): ").strip().lower()
         if setup_done == 'y':
+            # Read the saved credentials directly with the audible
+            # library - no interpreter startup or cold re-import of the
+            # audible stack in a child process.
+            try:
+                import audible
+                auth = audible.Authenticator.from_file(config_dir / "audible.json")
+                activation_bytes = auth.activation_bytes
+                if activation_bytes:
+                    print(f"✓ Activation bytes retrieved: {activation_bytes}")
+                    return activation_bytes
+            except Exception as e:
+                print(f"Could not read activation bytes in-process ({e}), trying audible-cli...")
+
+            # Fall back to shelling out to audible-cli
             try:
-                import subprocess
-                result = subprocess.run(['py', '-m', 'audible_cli', 'activation-bytes'], 
+                result = subprocess.run(['py', '-m', 'audible_cli', 'activation-bytes'],
                                       capture_output=True, text=True, timeout=30)
                 if result.returncode == 0:
                     output = result.stdout.strip()
@@ -118,33 +146,47 @@ def method4_file_search():
         Path.home() / "Documents",
         Path.home() / "Downloads"
     ]
-    
+
+    # find_activation_bytes.py caches its scan of these same roots; if
+    # nothing changed since then, skip the walk entirely.
+    cached = load_scan_cache([p for p in search_paths if p.exists()])
+    if cached is not None:
+        candidates, _ = cached
+        print("Using cached scan results (no search location has changed).")
+        if candidates:
+            print(f"Found activation bytes: {candidates[0]}")
+            return candidates[0]
+        return None
+
     for search_path in search_paths:
         if search_path.exists():
             print(f"Searching in: {search_path}")
             try:
-                for file_path in search_path.rglob("*"):
-                    if file_path.is_file() and file_path.suffix.lower() in ['.json', '.txt', '.log', '.cfg', '.ini']:
-                        try:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read()
-                                # Look for 8-character hex strings that might be activation bytes
-                                import re
-                                hex_matches = re.findall(r'\b[0-9A-Fa-f]{8}\b', content)
-                                if hex_matches:
-                                    print(f"Found potential activation bytes in {file_path}: {hex_matches}")
-                        except:
-                            continue
+                for entry in iter_candidate_files([search_path], ('.json', '.txt', '.log', '.cfg', '.ini')):
+                    candidates = extract_hex_candidates(entry)
+                    if candidates:
+                        print(f"Found activation bytes in {entry.path}: {candidates[0]}")
+                        return candidates[0]
             except:
                 continue
-    
+
     return None
 
 def save_activation_bytes(activation_bytes):
     """Save activation bytes to a file for the converter app"""
     if activation_bytes:
-        with open('activation_bytes.txt', 'w') as f:
-            f.write(activation_bytes)
+        # Skip the write when the saved value is already current, and
+        # write-then-rename otherwise so a crash can't leave a torn file.
+        try:
+            with open('activation_bytes.txt', 'r') as f:
+                current = f.read().strip()
+        except OSError:
+            current = ''
+        if current != activation_bytes:
+            tmp_file = 'activation_bytes.txt.tmp'
+            with open(tmp_file, 'w') as f:
+                f.write(activation_bytes)
+            os.replace(tmp_file, 'activation_bytes.txt')
         print(f"\n✓ Activation bytes saved to: activation_bytes.txt")
         print(f"You can now use these in the Audible Converter app: {activation_bytes}")
 
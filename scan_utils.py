@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Shared directory-scan helpers for the activation-bytes search scripts.
+
+find_activation_bytes.py and get_activation_bytes.py used to carry
+near-identical walkers and regexes and re-traverse the same roots; the
+single traversal and extraction logic lives here instead.
+"""
+
+import os
+import re
+import mmap
+
+# Directory names that never hold Audible config but can contain huge
+# trees (package caches, VCS metadata, virtualenvs).
+SKIP_DIRS = {'node_modules', '.git', '__pycache__', '.venv', 'venv',
+             'site-packages', 'AppData\\Local\\Temp', '$RECYCLE.BIN'}
+SKIP_PREFIXES = ('.', '~')
+MAX_SCAN_DEPTH = 6
+
+# Anything larger than this is not a credentials/config file; skip it
+# rather than scan megabytes of log noise.
+MAX_SCAN_FILE_SIZE = 16 * 1024 * 1024
+# Files above this size are mapped instead of read into a string, so the
+# regex runs over the page cache directly and RSS stays flat.
+_MMAP_THRESHOLD = 64 * 1024
+
+# Single alternation covering all the shapes activation bytes take in
+# config/log files, so each file is scanned once instead of four times.
+# Group 1 matches keyword-anchored hits ('activation_bytes: "12345678"',
+# '"activation_bytes": ...', 'bytes= ...'); group 2 matches any bare
+# quoted/whitespace-delimited 8-char hex string.
+_ACTIVATION_PATTERN = re.compile(
+    rb'(?:"?activation.?bytes"?|bytes)["\s:=]+([0-9A-Fa-f]{8})'
+    rb'|["\s]([0-9A-Fa-f]{8})["\s]',
+    re.IGNORECASE)
+
+def _scandir_recursive(path, max_depth):
+    """Recursive os.scandir walk yielding file entries.
+
+    scandir exposes the file type straight from the directory listing,
+    so this walks without the extra stat() per entry that Path.rglob
+    pays. Symlinks and known junk directories are skipped and recursion
+    stops at max_depth, since activation bytes never live that deep.
+    """
+    if max_depth < 0:
+        return
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_symlink():
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in SKIP_DIRS or entry.name.startswith(SKIP_PREFIXES):
+                            continue
+                        yield from _scandir_recursive(entry.path, max_depth - 1)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+                except OSError:
+                    continue
+    except (PermissionError, FileNotFoundError):
+        return
+
+def iter_candidate_files(roots, exts, max_depth=MAX_SCAN_DEPTH):
+    """Yield os.DirEntry objects under roots whose names match exts."""
+    # str.endswith against a tuple is a single C call, cheaper than
+    # splitting the suffix off every name in a 100k-entry tree.
+    exts = tuple(ext.lower() for ext in exts)
+    for root in roots:
+        for entry in _scandir_recursive(root, max_depth):
+            if entry.name.lower().endswith(exts):
+                yield entry
+
+def extract_hex_candidates(entry):
+    """Return candidate activation-bytes strings from one file entry.
+
+    Oversized and unreadable files yield an empty list. Bare 8-hex
+    matches (log hashes, UUID fragments...) only count when they sit
+    near an 'activation'/'bytes' mention and the keyword-anchored
+    pattern found nothing in the file.
+    """
+    try:
+        size = entry.stat().st_size
+        if size == 0 or size > MAX_SCAN_FILE_SIZE:
+            return []
+
+        # Search the file; big ones get mmap'd so the regex scans the
+        # page cache instead of a copied string, small ones come in via
+        # one raw os.read with no BufferedReader in between (O_BINARY is
+        # a no-op outside Windows).
+        fd = os.open(entry.path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            if size > _MMAP_THRESHOLD:
+                content = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            else:
+                content = os.read(fd, size)
+            try:
+                # Substring scan is a tight C loop; skip the regex
+                # entirely for the vast majority of files that never
+                # mention activation bytes.
+                if content.find(b'ctivation') == -1 and content.find(b'ytes') == -1:
+                    return []
+
+                keyword_hits = []
+                generic_hits = []
+                for m in _ACTIVATION_PATTERN.finditer(content):
+                    if m.group(1):
+                        keyword_hits.append(m.group(1))
+                    else:
+                        start = m.start(2)
+                        window = bytes(content[max(0, start - 64):start + 72]).lower()
+                        if b'activation' in window or b'bytes' in window:
+                            generic_hits.append(m.group(2))
+
+                # Generic hits are a fallback for files where the
+                # keyword-anchored pattern found nothing.
+                candidates = []
+                for raw in (keyword_hits or generic_hits):
+                    match = raw.decode('ascii').upper()
+                    if match not in candidates:
+                        candidates.append(match)
+                return candidates
+            finally:
+                if isinstance(content, mmap.mmap):
+                    content.close()
+        finally:
+            os.close(fd)
+
+    except Exception:
+        # Skip files that can't be read
+        return []
@@ -6,38 +6,147 @@ Uses Selenium WebDriver to automate Audible login and extract activation bytes
 """
 
 import os
+import re
 import sys
 import time
 import base64
-import hashlib
 import binascii
 import requests
 import json
+import functools
 from pathlib import Path
-from urllib.parse import urlencode, urlparse, parse_qsl
-
-try:
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.webdriver.chrome.options import Options as ChromeOptions
-    from selenium.webdriver.firefox.options import Options as FirefoxOptions
-    from webdriver_manager.chrome import ChromeDriverManager
-    from webdriver_manager.firefox import GeckoDriverManager
-    from selenium.webdriver.chrome.service import Service as ChromeService
-    from selenium.webdriver.firefox.service import Service as FirefoxService
-    SELENIUM_AVAILABLE = True
-except ImportError:
-    SELENIUM_AVAILABLE = False
+from urllib.parse import urlencode, urlparse, parse_qsl, quote_plus
+from concurrent.futures import ThreadPoolExecutor
+
+# Selenium and webdriver_manager pull in dozens of submodules, so the
+# import is deferred until a browser is actually needed; scripts that
+# merely import this module (or only run check_dependencies) stay fast.
+@functools.lru_cache(maxsize=1)
+def _load_selenium():
+    """Import selenium + webdriver_manager into module globals once.
+
+    Returns True when everything is available, False when not installed.
+    lru_cache makes repeat calls free either way."""
+    global webdriver, By, WebDriverWait, EC, ChromeOptions, FirefoxOptions
+    global ChromeDriverManager, GeckoDriverManager, ChromeService, FirefoxService
+    global TimeoutException, SessionNotCreatedException
+    try:
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.chrome.options import Options as ChromeOptions
+        from selenium.webdriver.firefox.options import Options as FirefoxOptions
+        from webdriver_manager.chrome import ChromeDriverManager
+        from webdriver_manager.firefox import GeckoDriverManager
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        from selenium.webdriver.firefox.service import Service as FirefoxService
+        from selenium.common.exceptions import TimeoutException, SessionNotCreatedException
+        return True
+    except ImportError:
+        return False
+
+# Patterns for activation bytes in page source, compiled once at import.
+# The old in-function literals escaped the backslash ('\\s'), so they
+# matched a literal backslash rather than whitespace and the JSON form
+# with spaces around the colon was never found.
+_JSON_ACT_RE = re.compile(r'["\']activation_bytes["\']\s*:\s*["\']([A-Fa-f0-9]{8})["\']')
+_HEX8_RE = re.compile(r'["\']([0-9A-Fa-f]{8})["\']')
+
+# Browser-side search script: matching runs against the live DOM inside
+# the browser, so only the 8-character hit crosses the WebDriver bridge
+# instead of the whole serialized page source.
+_JS_FIND_ACTIVATION = r"""
+const html = document.documentElement.outerHTML;
+let m = html.match(/["']activation_bytes["']\s*:\s*["']([A-Fa-f0-9]{8})["']/);
+if (m) { return ['exact', m[1]]; }
+m = [...document.scripts].map(s => s.textContent).join('\n')
+    .match(/["']([A-Fa-f0-9]{8})["']/);
+return m ? ['loose', m[1]] : null;
+"""
+
+# Async wait used on the player-auth-token page: a MutationObserver
+# fires the callback the instant a node containing activation_bytes is
+# inserted, instead of waiting a fixed interval and scanning after the
+# fact. Falls back to null after 15s so the caller can try other paths.
+_JS_WAIT_ACTIVATION = r"""
+const cb = arguments[arguments.length - 1];
+const rx = /["']activation_bytes["']\s*:\s*["']([A-Fa-f0-9]{8})["']/;
+const scan = () => {
+    const m = document.documentElement.outerHTML.match(rx);
+    if (m) { cb(m[1]); return true; }
+    return false;
+};
+if (scan()) { return; }
+const obs = new MutationObserver(() => { if (scan()) { obs.disconnect(); } });
+obs.observe(document.documentElement,
+            {childList: true, subtree: true, characterData: true});
+setTimeout(() => { obs.disconnect(); cb(null); }, 15000);
+"""
+
+# The non-custom player ID is the base64 SHA-1 of an empty string:
+# base64.b64encode(hashlib.sha1(b"").digest()).decode('ascii'). That is
+# a fixed value, so it lives here as a literal instead of being hashed
+# and encoded at import (test_selenium_extraction.py guards the
+# derivation).
+_DEFAULT_PLAYER_ID = "2jmj7l5rSw0yVb/vlWAYkK/YBwk="
+
+# Resolved driver binaries are remembered here so webdriver-manager's
+# version check - an HTTP round-trip even when the driver is already on
+# disk - only runs when the cached binary is missing or stale.
+_DRIVER_CACHE_FILE = Path.home() / ".audible-downloader" / "drivers.json"
+
+def _load_cached_driver_path(browser):
+    """Return the cached driver binary path for browser if still usable."""
+    try:
+        with open(_DRIVER_CACHE_FILE, 'r', encoding='utf-8') as f:
+            path = json.load(f).get(browser)
+        if path and os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    except Exception:
+        pass
+    return None
+
+def _store_cached_driver_path(browser, path):
+    """Remember the resolved driver binary path for browser."""
+    try:
+        _DRIVER_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(_DRIVER_CACHE_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except Exception:
+            cache = {}
+        cache[browser] = path
+        with open(_DRIVER_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+    except Exception:
+        pass
+
+# Same UA the Chrome options advertise, reused for direct HTTP calls.
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
 
 class SeleniumActivationExtractor:
-    def __init__(self, lang='us', debug=False, use_firefox=False):
+    def __init__(self, lang='us', debug=False, use_firefox=False, profile_name=None):
         self.lang = lang
         self.debug = debug
         self.use_firefox = use_firefox
         self.driver = None
-        
+        # Browsers refuse to open a profile directory that another
+        # instance holds, so concurrent extractors (batch mode) each
+        # need their own named profile; None means the shared default.
+        self._profile_name = profile_name
+        self._profile_warm = False
+
+        # Pooled HTTP session for direct calls made with cookies handed
+        # off from the browser; keep-alive avoids paying a fresh TCP+TLS
+        # handshake per request.
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
         # Base URLs for different regions
         self.base_urls = {
             'us': 'https://www.audible.com/',
@@ -50,10 +159,32 @@ class SeleniumActivationExtractor:
         }
         
         self.base_url = self.base_urls.get(lang, self.base_urls['us'])
-        
+
+        # The login endpoints and the static part of the OpenID query
+        # depend only on lang, so build them once per instance instead
+        # of re-branching and re-encoding on every extraction.
+        amazon_signin_urls = {
+            'us': 'https://www.amazon.com/ap/signin?',
+            'uk': 'https://www.amazon.co.uk/ap/signin?',
+            'de': 'https://www.amazon.de/ap/signin?',
+            'fr': 'https://www.amazon.fr/ap/signin?',
+            'jp': 'https://www.amazon.co.jp/ap/signin?',
+            'au': 'https://www.amazon.com.au/ap/signin?',
+            'in': 'https://www.amazon.in/ap/signin?'
+        }
+        self._amazon_signin_url = amazon_signin_urls.get(lang, amazon_signin_urls['us'])
+        self._audible_signin_url = f"{self.base_url}sign-in/ref=ap_to_private?forcePrivateSignIn=true&rdPath={self.base_url}?"
+        self._openid_static_qs = urlencode({
+            'openid.ns': 'http://specs.openid.net/auth/2.0',
+            'openid.identity': 'http://specs.openid.net/auth/2.0/identifier_select',
+            'openid.claimed_id': 'http://specs.openid.net/auth/2.0/identifier_select',
+            'openid.mode': 'logout',
+            'openid.assoc_handle': f'amzn_audible_{lang}'
+        })
+
     def check_dependencies(self):
         """Check if required dependencies are available"""
-        if not SELENIUM_AVAILABLE:
+        if not _load_selenium():
             return False, "Selenium is not installed. Install with: pip install selenium"
         
         # With webdriver-manager, we don't need to manually check for driver availability
@@ -62,31 +193,138 @@ class SeleniumActivationExtractor:
     
     def setup_driver(self):
         """Set up Selenium WebDriver"""
+        if not _load_selenium():
+            raise ImportError("Selenium is not installed. Install with: pip install selenium")
         try:
             if self.use_firefox:
                 options = FirefoxOptions()
+                # Return from driver.get at DOMContentLoaded instead of
+                # waiting for every tracker and image to finish; the
+                # scraping below only needs the DOM.
+                options.page_load_strategy = 'eager'
+                options.set_preference('permissions.default.image', 2)
+                # No updater or crash-reporter traffic during a scrape
+                options.set_preference('app.update.enabled', False)
+                options.set_preference('app.update.auto', False)
+                options.set_preference('toolkit.telemetry.enabled', False)
+                options.set_preference('datareporting.healthreport.uploadEnabled', False)
                 if not self.debug:
                     options.add_argument('--headless')
                 options.add_argument('--no-sandbox')
                 options.add_argument('--disable-dev-shm-usage')
-                
-                # Use webdriver-manager to automatically download and manage GeckoDriver
-                service = FirefoxService(GeckoDriverManager().install())
-                self.driver = webdriver.Firefox(service=service, options=options)
+
+                # Persist the profile so repeat runs reuse HTTP cache,
+                # TLS session state and cookies instead of starting cold
+                dir_name = ("firefox-profile-" + self._profile_name
+                            if self._profile_name else "firefox-profile")
+                profile_dir = Path.home() / ".audible-downloader" / dir_name
+                profile_dir.mkdir(parents=True, exist_ok=True)
+                self._profile_warm = (profile_dir / "cookies.sqlite").exists()
+                options.add_argument('-profile')
+                options.add_argument(str(profile_dir))
+
+                # Reuse the cached GeckoDriver when possible; only ask
+                # webdriver-manager (and the network) when needed
+                cached = _load_cached_driver_path('firefox')
+                driver_path = cached or GeckoDriverManager().install()
+                if not cached:
+                    _store_cached_driver_path('firefox', driver_path)
+                try:
+                    self.driver = webdriver.Firefox(service=FirefoxService(driver_path), options=options)
+                except SessionNotCreatedException:
+                    if not cached:
+                        raise
+                    # Cached driver no longer matches the installed browser
+                    driver_path = GeckoDriverManager().install()
+                    _store_cached_driver_path('firefox', driver_path)
+                    self.driver = webdriver.Firefox(service=FirefoxService(driver_path), options=options)
             else:
                 options = ChromeOptions()
-                options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+                options.add_argument(f"user-agent={USER_AGENT}")
+                # Return from driver.get at DOMContentLoaded instead of
+                # waiting for every tracker and image to finish; the
+                # scraping below only needs the DOM.
+                options.page_load_strategy = 'eager'
+                options.add_argument('--blink-settings=imagesEnabled=false')
+                # Capture CDP network events so responses can be read
+                # directly instead of scraping the rendered page
+                options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+                options.add_experimental_option('prefs', {
+                    'profile.managed_default_content_settings.images': 2,
+                    'profile.default_content_setting_values.notifications': 2,
+                })
                 if not self.debug:
-                    options.add_argument('--headless')
+                    # headless=new runs the regular browser pipeline, so
+                    # the old --disable-gpu workaround is unnecessary; a
+                    # small window keeps layout/raster work down when
+                    # nobody is looking at the screen anyway.
+                    options.add_argument('--headless=new')
+                    options.add_argument('--window-size=800,600')
+                else:
+                    options.add_argument('--window-size=1920,1080')
                 options.add_argument('--no-sandbox')
                 options.add_argument('--disable-dev-shm-usage')
-                options.add_argument('--disable-gpu')
-                options.add_argument('--window-size=1920,1080')
-                
-                # Use webdriver-manager to automatically download and manage ChromeDriver
-                service = ChromeService(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=options)
-            
+                options.add_argument('--disable-software-rasterizer')
+
+                # Skip subsystems a one-shot scraping session never
+                # needs: extensions, background/update networking, crash
+                # reporting, phishing checks and first-run setup all add
+                # startup latency and background requests.
+                for flag in ('--disable-extensions',
+                             '--disable-background-networking',
+                             '--disable-background-timer-throttling',
+                             '--disable-breakpad',
+                             '--disable-client-side-phishing-detection',
+                             '--disable-component-extensions-with-background-pages',
+                             '--disable-default-apps',
+                             '--disable-hang-monitor',
+                             '--disable-popup-blocking',
+                             '--disable-prompt-on-repost',
+                             '--disable-sync',
+                             '--metrics-recording-only',
+                             '--no-first-run',
+                             '--safebrowsing-disable-auto-update'):
+                    options.add_argument(flag)
+
+                # Persist the profile so repeat runs reuse HTTP cache,
+                # TLS session state and cookies instead of starting cold
+                dir_name = ("chrome-profile-" + self._profile_name
+                            if self._profile_name else "chrome-profile")
+                profile_dir = Path.home() / ".audible-downloader" / dir_name
+                profile_dir.mkdir(parents=True, exist_ok=True)
+                self._profile_warm = (profile_dir / "Default" / "Cookies").exists()
+                options.add_argument(f"--user-data-dir={profile_dir}")
+
+                # Reuse the cached ChromeDriver when possible; only ask
+                # webdriver-manager (and the network) when needed
+                cached = _load_cached_driver_path('chrome')
+                driver_path = cached or ChromeDriverManager().install()
+                if not cached:
+                    _store_cached_driver_path('chrome', driver_path)
+                try:
+                    self.driver = webdriver.Chrome(service=ChromeService(driver_path), options=options)
+                except SessionNotCreatedException:
+                    if not cached:
+                        raise
+                    # Cached driver no longer matches the installed browser
+                    driver_path = ChromeDriverManager().install()
+                    _store_cached_driver_path('chrome', driver_path)
+                    self.driver = webdriver.Chrome(service=ChromeService(driver_path), options=options)
+
+                # Drop ad/tracker/static-asset requests at the browser's
+                # network layer - none of them matter for finding
+                # activation bytes. CDP is Chrome-only, and blocking is
+                # best-effort: failures just mean a heavier page load.
+                try:
+                    self.driver.execute_cdp_cmd("Network.enable", {})
+                    self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": [
+                        "*google-analytics*", "*doubleclick*", "*amazon-adsystem*",
+                        "*fls-na.amazon*", "*aan.amazon*",
+                        "*.jpg", "*.png", "*.gif", "*.woff*"
+                    ]})
+                except Exception:
+                    pass
+
             return True, "WebDriver initialized successfully"
             
         except Exception as e:
@@ -98,10 +336,72 @@ class SeleniumActivationExtractor:
             player_id = base64.b64encode(binascii.unhexlify(custom_id)).decode('ascii').rstrip()
         else:
             # Use empty string hash for consistent player ID
-            player_id = base64.b64encode(hashlib.sha1(b"").digest()).decode('ascii').rstrip()
-        
+            player_id = _DEFAULT_PLAYER_ID
+
         return player_id
     
+    def _find_activation_bytes_in_responses(self):
+        """Scan captured network responses for activation bytes.
+
+        Chrome's performance log carries a CDP Network.responseReceived
+        event per response; for the ones hitting the auth-token/license
+        endpoints the body is fetched via Network.getResponseBody and
+        matched directly - no waiting for the HTML to render. Returns
+        None on Firefox (no CDP) or when nothing matches."""
+        if self.use_firefox:
+            return None
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            return None
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+                if message.get('method') != 'Network.responseReceived':
+                    continue
+                response_url = message['params']['response'].get('url', '')
+                if 'player-auth-token' not in response_url and 'license' not in response_url:
+                    continue
+                body = self.driver.execute_cdp_cmd(
+                    'Network.getResponseBody',
+                    {'requestId': message['params']['requestId']})
+                match = _JSON_ACT_RE.search(body.get('body', ''))
+                if match:
+                    return match.group(1)
+            except Exception:
+                continue
+        return None
+
+    def _find_activation_bytes_in_page(self):
+        """Search the current page for activation bytes.
+
+        Returns (activation_bytes, exact) where exact is True for a
+        keyword-anchored JSON hit. Prefers the browser-side script and
+        falls back to pulling page_source through the bridge."""
+        try:
+            found = self.driver.execute_script(_JS_FIND_ACTIVATION)
+            if found:
+                kind, value = found
+                return value, kind == 'exact'
+            return None, False
+        except Exception:
+            pass
+
+        page_source = self.driver.page_source
+        # 'in' is a tight C substring scan, far cheaper than running the
+        # anchored regex over a page that never mentions the key at all.
+        if "activation_bytes" in page_source:
+            match = _JSON_ACT_RE.search(page_source)
+            if match:
+                return match.group(1), True
+        # The pattern already guarantees exactly 8 hex characters, so no
+        # per-character re-validation is needed; dict.fromkeys dedups the
+        # same value repeated across script blocks while keeping order.
+        potential_bytes = list(dict.fromkeys(m.upper() for m in _HEX8_RE.findall(page_source)))
+        if potential_bytes:
+            return potential_bytes[0], False
+        return None, False
+
     def extract_activation_bytes(self, username, password, player_id=None):
         """Extract activation bytes using Selenium automation"""
         
@@ -124,42 +424,29 @@ class SeleniumActivationExtractor:
             print(f"[*] Target region: {self.lang}")
             print(f"[*] Base URL: {self.base_url}")
             
-            # Determine login URL based on username format
+            # Determine login URL based on username format: Amazon
+            # login for emails, direct Audible login otherwise
             if '@' in username:
-                # Amazon login using email
-                login_url = "https://www.amazon.com/ap/signin?"
-                if self.lang == "uk":
-                    login_url = "https://www.amazon.co.uk/ap/signin?"
-                elif self.lang == "de":
-                    login_url = "https://www.amazon.de/ap/signin?"
-                elif self.lang == "fr":
-                    login_url = "https://www.amazon.fr/ap/signin?"
-                elif self.lang == "jp":
-                    login_url = "https://www.amazon.co.jp/ap/signin?"
-                elif self.lang == "au":
-                    login_url = "https://www.amazon.com.au/ap/signin?"
-                elif self.lang == "in":
-                    login_url = "https://www.amazon.in/ap/signin?"
+                login_url = self._amazon_signin_url
             else:
-                # Direct Audible login
-                login_url = f"{self.base_url}sign-in/ref=ap_to_private?forcePrivateSignIn=true&rdPath={self.base_url}?"
-            
-            # Prepare OpenID payload
-            payload = {
-                'openid.ns': 'http://specs.openid.net/auth/2.0',
-                'openid.identity': 'http://specs.openid.net/auth/2.0/identifier_select',
-                'openid.claimed_id': 'http://specs.openid.net/auth/2.0/identifier_select',
-                'openid.mode': 'logout',
-                'openid.assoc_handle': f'amzn_audible_{self.lang}',
-                'openid.return_to': f'{self.base_url}player-auth-token?playerType=software&playerId={player_id}&bp_ua=y&playerModel=Desktop&playerManufacturer=Audible'
-            }
-            
-            query_string = urlencode(payload)
+                login_url = self._audible_signin_url
+
+            # Only the player-dependent return_to needs encoding here;
+            # the rest of the OpenID query was built in __init__.
+            return_to = (f'{self.base_url}player-auth-token?playerType=software'
+                         f'&playerId={player_id}&bp_ua=y&playerModel=Desktop'
+                         f'&playerManufacturer=Audible')
+            query_string = self._openid_static_qs + '&openid.return_to=' + quote_plus(return_to)
             url = login_url + query_string
             
-            print("[*] Navigating to Audible...")
-            self.driver.get(f"{self.base_url}?ipRedirectOverride=true")
-            
+            # The homepage warmup only exists to establish cookies and
+            # region state; a warm profile already has both.
+            if self._profile_warm:
+                print("[*] Reusing warm browser profile, skipping warmup visit")
+            else:
+                print("[*] Navigating to Audible...")
+                self.driver.get(f"{self.base_url}?ipRedirectOverride=true")
+
             print("[*] Navigating to login page...")
             self.driver.get(url)
             
@@ -181,24 +468,41 @@ class SeleniumActivationExtractor:
                 print("[*] Attempting automated login...")
                 
                 # Wait for login form to load
-                wait = WebDriverWait(self.driver, 10)
+                # Poll at 100ms - the default 500ms tick adds up to
+                # half a second of dead time to every wait.
+                wait = WebDriverWait(self.driver, 10, poll_frequency=0.1)
                 
                 try:
-                    # Find email/username field
-                    email_field = wait.until(EC.presence_of_element_located((By.ID, 'ap_email')))
-                    email_field.clear()
-                    email_field.send_keys(username)
-                    
-                    # Find password field
-                    password_field = self.driver.find_element(By.ID, 'ap_password')
-                    password_field.clear()
-                    password_field.send_keys(password)
-                    
-                    # Submit form
-                    password_field.submit()
-                    
+                    # Wait for the form, then fill and submit it with a
+                    # single script call - every find/clear/send_keys is
+                    # its own HTTP round-trip to the driver binary, and
+                    # this folds them all into one. Input events are
+                    # dispatched so any change listeners still fire.
+                    wait.until(EC.presence_of_element_located((By.ID, 'ap_email')))
+                    self.driver.execute_script(
+                        "const e = document.getElementById('ap_email');"
+                        "const p = document.getElementById('ap_password');"
+                        "e.value = arguments[0];"
+                        "p.value = arguments[1];"
+                        "e.dispatchEvent(new Event('input', {bubbles: true}));"
+                        "p.dispatchEvent(new Event('input', {bubbles: true}));"
+                        "const s = document.getElementById('signInSubmit');"
+                        "if (s) { s.click(); } else { p.form.submit(); }",
+                        username, password)
+
                     print("[*] Login submitted, waiting for response...")
-                    time.sleep(5)
+                    # Wait for a recognizable post-login state instead of
+                    # a blanket sleep; a timeout just falls through to
+                    # the error checks below.
+                    try:
+                        WebDriverWait(self.driver, 15, poll_frequency=0.1).until(EC.any_of(
+                            EC.url_contains("player-auth-token"),
+                            EC.url_contains("library"),
+                            EC.presence_of_element_located((By.ID, "nav-main")),
+                            EC.presence_of_element_located((By.ID, "auth-error-message-box"))
+                        ))
+                    except TimeoutException:
+                        pass
                     
                 except Exception as e:
                     print(f"[!] Login automation failed: {e}")
@@ -208,48 +512,74 @@ class SeleniumActivationExtractor:
             # If not in debug mode, check for common error conditions
             if not self.debug:
                 current_url = self.driver.current_url
-                page_source = self.driver.page_source.lower()
-                
-                if "captcha" in page_source or "robot" in page_source:
+                # page_source serializes the whole DOM across the
+                # WebDriver bridge; pull it once per navigation and keep
+                # a lowered copy for the substring checks.
+                src = self.driver.page_source
+                src_lower = src.lower()
+
+                if "captcha" in src_lower or "robot" in src_lower:
                     return None, "CAPTCHA detected. Please try again later or use debug mode."
                 
-                if "two-step" in page_source or "2fa" in page_source or "verification" in page_source:
+                if "two-step" in src_lower or "2fa" in src_lower or "verification" in src_lower:
                     return None, "Two-factor authentication detected. Please use debug mode for manual verification."
                 
-                if "sign-in" in current_url and "error" in page_source:
+                if "sign-in" in current_url and "error" in src_lower:
                     return None, "Login failed. Please check your credentials."
-            
+
+                # The source is already in hand, so a substring test is
+                # free: if the token landed on this very page, take it
+                # here and skip the wait/scrape machinery below.
+                if "activation_bytes" in src:
+                    match = _JSON_ACT_RE.search(src)
+                    if match:
+                        activation_bytes = match.group(1).upper()
+                        print(f"[*] Found activation bytes: {activation_bytes}")
+                        return activation_bytes, "Success"
+
+            # Hand the browser's cookies to the pooled session so any
+            # direct HTTP follow-ups reuse the authenticated state.
+            try:
+                for cookie in self.driver.get_cookies():
+                    self.session.cookies.set(cookie['name'], cookie['value'],
+                                             domain=cookie.get('domain'))
+            except Exception:
+                pass
+
             # Look for activation token in the current page or redirects
             print("[*] Searching for activation data...")
-            
+
+            # Check captured network traffic first - the token arrives
+            # in a backend response before it ever reaches the DOM.
+            from_network = self._find_activation_bytes_in_responses()
+            if from_network:
+                activation_bytes = from_network.upper()
+                print(f"[*] Found activation bytes in network response: {activation_bytes}")
+                return activation_bytes, "Success"
+
             # Check if we're on the player-auth-token page
             if "player-auth-token" in current_url:
                 print("[*] Found player auth token page")
-                
-                # Try to extract activation bytes from page source or network requests
-                page_source = self.driver.page_source
-                
-                # Look for activation bytes in various formats
-                import re
-                
-                # Pattern 1: Direct activation_bytes in JSON
-                json_pattern = r'["\']activation_bytes["\']\\s*:\\s*["\']([A-Fa-f0-9]{8})["\']'
-                match = re.search(json_pattern, page_source)
-                if match:
-                    activation_bytes = match.group(1).upper()
+
+                # Let a MutationObserver watch the live DOM first; it
+                # resolves the moment the token appears, even when the
+                # page fills it in asynchronously after load.
+                try:
+                    self.driver.set_script_timeout(20)
+                    observed = self.driver.execute_async_script(_JS_WAIT_ACTIVATION)
+                except Exception:
+                    observed = None
+                if observed:
+                    activation_bytes = observed.upper()
                     print(f"[*] Found activation bytes: {activation_bytes}")
                     return activation_bytes, "Success"
-                
-                # Pattern 2: Look in script tags or data attributes
-                script_pattern = r'["\']([A-Fa-f0-9]{8})["\']'
-                matches = re.findall(script_pattern, page_source)
-                
-                # Filter potential activation bytes (8 hex chars)
-                potential_bytes = [m.upper() for m in matches if len(m) == 8 and all(c in '0123456789ABCDEFabcdef' for c in m)]
-                
-                if potential_bytes:
-                    # Take the first valid-looking activation bytes
-                    activation_bytes = potential_bytes[0]
+
+                found, exact = self._find_activation_bytes_in_page()
+                if found:
+                    activation_bytes = found.upper()
+                    if exact:
+                        print(f"[*] Found activation bytes: {activation_bytes}")
+                        return activation_bytes, "Success"
                     print(f"[*] Found potential activation bytes: {activation_bytes}")
                     return activation_bytes, "Success (potential match)"
             
@@ -259,18 +589,25 @@ class SeleniumActivationExtractor:
             try:
                 library_url = f"{self.base_url}library"
                 self.driver.get(library_url)
-                time.sleep(3)
+                # Wait for library content rather than sleeping a fixed
+                # interval; a timeout still lets the scan below run.
+                try:
+                    WebDriverWait(self.driver, 10, poll_frequency=0.1).until(
+                        EC.presence_of_element_located(
+                            (By.CSS_SELECTOR, "[class*='adbl-library'], [data-asin]"))
+                    )
+                except TimeoutException:
+                    pass
                 
                 # Look for any books and try to access them
                 # This might trigger activation bytes to be sent
-                
-                # Check page source again for activation bytes
-                page_source = self.driver.page_source
-                
-                json_pattern = r'["\']activation_bytes["\']\\s*:\\s*["\']([A-Fa-f0-9]{8})["\']'
-                match = re.search(json_pattern, page_source)
-                if match:
-                    activation_bytes = match.group(1).upper()
+
+                # Check the library page for activation bytes; only a
+                # keyword-anchored hit counts here, bare hex on a full
+                # library page is too noisy.
+                found, exact = self._find_activation_bytes_in_page()
+                if found and exact:
+                    activation_bytes = found.upper()
                     print(f"[*] Found activation bytes in library: {activation_bytes}")
                     return activation_bytes, "Success"
                 
@@ -285,7 +622,41 @@ class SeleniumActivationExtractor:
         finally:
             if self.driver:
                 self.driver.quit()
+            self.session.close()
     
+    @classmethod
+    def batch_extract(cls, accounts):
+        """Extract activation bytes for several accounts concurrently.
+
+        accounts is a list of dicts with 'username' and 'password' plus
+        optional 'lang', 'firefox' and 'player_id' keys. Each worker
+        drives its own browser with its own per-account profile
+        directory (browsers refuse to share one) - the workload is
+        I/O-bound, so threads give near-linear speedup - and all of
+        them share the cached driver binary path, so only the first
+        run pays driver resolution. Returns a dict mapping username to
+        the (activation_bytes, message) result tuple."""
+        def run(account):
+            # Per-account profile: concurrent browsers can't share one
+            # profile directory, and keying on the username keeps each
+            # account's cookies warm for its own later runs.
+            profile_name = re.sub(r'[^A-Za-z0-9._-]', '_', account['username'])
+            extractor = cls(
+                lang=account.get('lang', 'us'),
+                use_firefox=account.get('firefox', False),
+                profile_name=profile_name
+            )
+            return extractor.extract_activation_bytes(
+                account['username'],
+                account['password'],
+                account.get('player_id')
+            )
+
+        with ThreadPoolExecutor(max_workers=min(8, len(accounts))) as executor:
+            results = executor.map(run, accounts)
+            return {account['username']: result
+                    for account, result in zip(accounts, results)}
+
     def save_activation_bytes(self, activation_bytes, filename="activation_bytes.txt"):
         """Save activation bytes to file"""
         try:
@@ -306,9 +677,21 @@ def main():
     parser.add_argument('--debug', '-d', action='store_true', help='Run in debug mode (manual login)')
     parser.add_argument('--firefox', '-f', action='store_true', help='Use Firefox instead of Chrome')
     parser.add_argument('--player-id', help='Custom player ID (hex)')
+    parser.add_argument('--batch', help='JSON file with a list of {username, password, lang} accounts')
     
     args = parser.parse_args()
-    
+
+    if args.batch:
+        with open(args.batch, 'r', encoding='utf-8') as f:
+            accounts = json.load(f)
+        results = SeleniumActivationExtractor.batch_extract(accounts)
+        for username, (activation_bytes, message) in results.items():
+            if activation_bytes:
+                print(f"✅ {username}: {activation_bytes}")
+            else:
+                print(f"❌ {username}: {message}")
+        return
+
     if not args.username:
         args.username = input("Audible username/email: ")
     
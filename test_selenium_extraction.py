@@ -9,7 +9,15 @@ import os
 # Add the current directory to the Python path to import our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from selenium_activator import SeleniumActivationExtractor
+from selenium_activator import SeleniumActivationExtractor, _DEFAULT_PLAYER_ID
+
+def test_default_player_id():
+    """Check the hardcoded default player ID against its derivation"""
+    import base64
+    import hashlib
+    derived = base64.b64encode(hashlib.sha1(b"").digest()).decode('ascii')
+    assert _DEFAULT_PLAYER_ID == derived, f"Default player ID mismatch: {derived}"
+    print("Default player ID matches its SHA-1 derivation.")
 
 def test_selenium_extraction():
     """Test the Selenium-based activation bytes extraction"""
@@ -31,4 +39,5 @@ def test_selenium_extraction():
     print("To test with real credentials, run the selenium_activator.py script directly.")
 
 if __name__ == "__main__":
+    test_default_player_id()
     test_selenium_extraction()